@@ -0,0 +1,69 @@
+"""exercise keyset and search indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 02:40:12.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS exercises_fts USING fts5(
+        name, description, content='exercises', content_rowid='rowid'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS exercises_fts_ai AFTER INSERT ON exercises BEGIN
+        INSERT INTO exercises_fts(rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS exercises_fts_ad AFTER DELETE ON exercises BEGIN
+        INSERT INTO exercises_fts(exercises_fts, rowid, name, description)
+        VALUES ('delete', old.rowid, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS exercises_fts_au AFTER UPDATE OF name, description ON exercises BEGIN
+        INSERT INTO exercises_fts(exercises_fts, rowid, name, description)
+        VALUES ('delete', old.rowid, old.name, old.description);
+        INSERT INTO exercises_fts(rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END""",
+    "INSERT INTO exercises_fts(exercises_fts) VALUES ('rebuild')",
+]
+
+POSTGRESQL_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_exercise_fts ON exercises USING gin "
+    "(to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, '')))",
+    "CREATE INDEX IF NOT EXISTS idx_exercise_name_trgm ON exercises USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_exercise_description_trgm ON exercises USING gin (description gin_trgm_ops)",
+]
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: databases created with create_all before migrations may already have these
+    op.execute("CREATE INDEX IF NOT EXISTS idx_exercise_difficulty_keyset ON exercises (difficulty_level, name, id)")
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        for statement in POSTGRESQL_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('exercises_fts_ai', 'exercises_fts_ad', 'exercises_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS exercises_fts")
+    elif dialect == 'postgresql':
+        for index in ('idx_exercise_fts', 'idx_exercise_name_trgm', 'idx_exercise_description_trgm'):
+            op.execute(f"DROP INDEX IF EXISTS {index}")
+    op.drop_index('idx_exercise_difficulty_keyset', table_name='exercises')
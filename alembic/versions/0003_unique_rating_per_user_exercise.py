@@ -0,0 +1,39 @@
+"""unique rating per user and exercise
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:12:40.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Concurrent ratings could have raced into duplicates; keep the most recent one per pair
+    op.execute("""
+        DELETE FROM ratings
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY user_id, exercise_id
+                    ORDER BY updated_at DESC, created_at DESC, id DESC
+                ) AS position
+                FROM ratings
+            ) ranked
+            WHERE position > 1
+        )
+    """)
+    # IF NOT EXISTS: databases created with create_all before migrations may already have it
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_rating_user_exercise ON ratings (user_id, exercise_id)")
+
+
+def downgrade() -> None:
+    op.drop_index('uq_rating_user_exercise', table_name='ratings')
@@ -0,0 +1,123 @@
+"""exercise rating stats
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 10:03:51.274466
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+RATING_VALUES = range(1, 6)
+
+
+def bucket(row, value):
+    return f"CASE WHEN {row}.value = {value} THEN 1 ELSE 0 END"
+
+
+def add_rating(row):
+    buckets = ", ".join(f"count_{value}" for value in RATING_VALUES)
+    bucket_values = ", ".join(bucket(row, value) for value in RATING_VALUES)
+    bucket_updates = ", ".join(f"count_{value} = exercise_rating_stats.count_{value} + excluded.count_{value}"
+                               for value in RATING_VALUES)
+    return (
+        f"INSERT INTO exercise_rating_stats (exercise_id, rating_sum, rating_count, {buckets}) "
+        f"VALUES ({row}.exercise_id, {row}.value, 1, {bucket_values}) "
+        f"ON CONFLICT (exercise_id) DO UPDATE SET "
+        f"rating_sum = exercise_rating_stats.rating_sum + excluded.rating_sum, "
+        f"rating_count = exercise_rating_stats.rating_count + 1, {bucket_updates}"
+    )
+
+
+def remove_rating(row):
+    bucket_updates = ", ".join(f"count_{value} = count_{value} - {bucket(row, value)}" for value in RATING_VALUES)
+    return (
+        f"UPDATE exercise_rating_stats SET rating_sum = rating_sum - {row}.value, "
+        f"rating_count = rating_count - 1, {bucket_updates} "
+        f"WHERE exercise_id = {row}.exercise_id"
+    )
+
+
+SQLITE_UPGRADE = [
+    f"""CREATE TRIGGER IF NOT EXISTS ratings_stats_ai AFTER INSERT ON ratings BEGIN
+        {add_rating("new")};
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ratings_stats_au AFTER UPDATE OF value, exercise_id ON ratings BEGIN
+        {remove_rating("old")};
+        {add_rating("new")};
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ratings_stats_ad AFTER DELETE ON ratings BEGIN
+        {remove_rating("old")};
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS exercises_rating_stats_ad AFTER DELETE ON exercises BEGIN
+        DELETE FROM exercise_rating_stats WHERE exercise_id = old.id;
+    END""",
+]
+
+POSTGRESQL_UPGRADE = [
+    f"""CREATE OR REPLACE FUNCTION ratings_stats_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            {remove_rating("OLD")};
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            {add_rating("NEW")};
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS ratings_stats ON ratings",
+    """CREATE TRIGGER ratings_stats AFTER INSERT OR DELETE OR UPDATE OF value, exercise_id ON ratings
+        FOR EACH ROW EXECUTE FUNCTION ratings_stats_apply()""",
+]
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    # Databases created with create_all before migrations may already have the table and triggers
+    if not sa.inspect(op.get_bind()).has_table('exercise_rating_stats'):
+        op.create_table('exercise_rating_stats',
+        sa.Column('exercise_id', sa.String(length=36), nullable=False),
+        sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('count_1', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('count_2', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('count_3', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('count_4', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('count_5', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['exercise_id'], ['exercises.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('exercise_id')
+        )
+        buckets = ", ".join(f"count_{value}" for value in RATING_VALUES)
+        bucket_sums = ", ".join(f"SUM({bucket('ratings', value)})" for value in RATING_VALUES)
+        op.execute(
+            f"INSERT INTO exercise_rating_stats (exercise_id, rating_sum, rating_count, {buckets}) "
+            f"SELECT exercise_id, SUM(value), COUNT(*), {bucket_sums} FROM ratings "
+            f"WHERE exercise_id IS NOT NULL GROUP BY exercise_id"
+        )
+
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        for statement in POSTGRESQL_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('ratings_stats_ai', 'ratings_stats_au', 'ratings_stats_ad', 'exercises_rating_stats_ad'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    elif dialect == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS ratings_stats ON ratings")
+        op.execute("DROP FUNCTION IF EXISTS ratings_stats_apply()")
+    op.drop_table('exercise_rating_stats')
@@ -0,0 +1,56 @@
+"""interaction and rating indexes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 11:26:08.930157
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+# IF NOT EXISTS: databases created with create_all before migrations may already have these
+INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_favorite_user_exercise ON favorites (user_id, exercise_id)",
+    "CREATE INDEX IF NOT EXISTS idx_favorite_exercise_user ON favorites (exercise_id, user_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_save_user_exercise ON saves (user_id, exercise_id)",
+    "CREATE INDEX IF NOT EXISTS idx_save_exercise_user ON saves (exercise_id, user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_rating_exercise ON ratings (exercise_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_exercise_creator ON exercises (creator_id)",
+]
+
+
+def upgrade() -> None:
+    # Nothing prevented duplicate pairs before; keep the earliest row of each
+    for table in ('favorites', 'saves'):
+        op.execute(f"""
+            DELETE FROM {table}
+            WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                        PARTITION BY user_id, exercise_id
+                        ORDER BY created_at, id
+                    ) AS position
+                    FROM {table}
+                ) ranked
+                WHERE position > 1
+            )
+        """)
+    for statement in INDEXES:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_exercise_creator', table_name='exercises')
+    op.drop_index('idx_rating_exercise', table_name='ratings')
+    op.drop_index('idx_save_exercise_user', table_name='saves')
+    op.drop_index('uq_save_user_exercise', table_name='saves')
+    op.drop_index('idx_favorite_exercise_user', table_name='favorites')
+    op.drop_index('uq_favorite_user_exercise', table_name='favorites')
@@ -0,0 +1,35 @@
+"""exercise interaction counters
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 12:14:37.602851
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases created with create_all before migrations may already have the columns
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('exercises')}
+    for column in ('favorite_count', 'save_count'):
+        if column not in columns:
+            op.add_column('exercises', sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+
+    # Counts so far lived only in Redis; recompute them from the association tables
+    op.execute("UPDATE exercises SET "
+               "favorite_count = (SELECT COUNT(*) FROM favorites WHERE favorites.exercise_id = exercises.id), "
+               "save_count = (SELECT COUNT(*) FROM saves WHERE saves.exercise_id = exercises.id)")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('exercises') as batch_op:
+        batch_op.drop_column('save_count')
+        batch_op.drop_column('favorite_count')
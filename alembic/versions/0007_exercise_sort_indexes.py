@@ -0,0 +1,142 @@
+"""exercise sort indexes
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 13:02:18.415327
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+RATING_VALUES = range(1, 6)
+
+
+def bucket(row, value):
+    return f"CASE WHEN {row}.value = {value} THEN 1 ELSE 0 END"
+
+
+def add_rating(row):
+    buckets = ", ".join(f"count_{value}" for value in RATING_VALUES)
+    bucket_values = ", ".join(bucket(row, value) for value in RATING_VALUES)
+    bucket_updates = ", ".join(f"count_{value} = exercise_rating_stats.count_{value} + excluded.count_{value}"
+                               for value in RATING_VALUES)
+    return (
+        f"INSERT INTO exercise_rating_stats (exercise_id, rating_sum, rating_count, {buckets}) "
+        f"VALUES ({row}.exercise_id, {row}.value, 1, {bucket_values}) "
+        f"ON CONFLICT (exercise_id) DO UPDATE SET "
+        f"rating_sum = exercise_rating_stats.rating_sum + excluded.rating_sum, "
+        f"rating_count = exercise_rating_stats.rating_count + 1, {bucket_updates}"
+    )
+
+
+def remove_rating(row):
+    bucket_updates = ", ".join(f"count_{value} = count_{value} - {bucket(row, value)}" for value in RATING_VALUES)
+    return (
+        f"UPDATE exercise_rating_stats SET rating_sum = rating_sum - {row}.value, "
+        f"rating_count = rating_count - 1, {bucket_updates} "
+        f"WHERE exercise_id = {row}.exercise_id"
+    )
+
+
+def refresh_average(row):
+    return (
+        f"UPDATE exercises SET rating_avg = COALESCE((SELECT CAST(rating_sum AS FLOAT) / rating_count "
+        f"FROM exercise_rating_stats WHERE exercise_id = {row}.exercise_id AND rating_count > 0), 0) "
+        f"WHERE id = {row}.exercise_id"
+    )
+
+
+SQLITE_TRIGGERS = {
+    'ratings_stats_ai': f"""CREATE TRIGGER ratings_stats_ai AFTER INSERT ON ratings BEGIN
+        {add_rating("new")};
+        {refresh_average("new")};
+    END""",
+    'ratings_stats_au': f"""CREATE TRIGGER ratings_stats_au AFTER UPDATE OF value, exercise_id ON ratings BEGIN
+        {remove_rating("old")};
+        {add_rating("new")};
+        {refresh_average("old")};
+        {refresh_average("new")};
+    END""",
+    'ratings_stats_ad': f"""CREATE TRIGGER ratings_stats_ad AFTER DELETE ON ratings BEGIN
+        {remove_rating("old")};
+        {refresh_average("old")};
+    END""",
+}
+
+POSTGRESQL_FUNCTION = f"""CREATE OR REPLACE FUNCTION ratings_stats_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            {remove_rating("OLD")};
+            {refresh_average("OLD")};
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            {add_rating("NEW")};
+            {refresh_average("NEW")};
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql"""
+
+SORT_INDEXES = {
+    'idx_exercise_created_keyset': ['created_at', 'id'],
+    'idx_exercise_favorites_keyset': ['favorite_count', 'id'],
+    'idx_exercise_rating_keyset': ['rating_avg', 'id'],
+}
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    # Databases created with create_all before migrations may already have the column and indexes
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('exercises')}
+    if 'rating_avg' not in columns:
+        op.add_column('exercises', sa.Column('rating_avg', sa.Float(), server_default='0', nullable=False))
+    op.execute("UPDATE exercises SET rating_avg = COALESCE((SELECT CAST(rating_sum AS FLOAT) / rating_count "
+               "FROM exercise_rating_stats WHERE exercise_id = exercises.id AND rating_count > 0), 0)")
+
+    # Replace the rating triggers with versions that also maintain rating_avg
+    if dialect == 'sqlite':
+        for trigger, statement in SQLITE_TRIGGERS.items():
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute(POSTGRESQL_FUNCTION)
+
+    for name, columns in SORT_INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON exercises ({', '.join(columns)})")
+
+
+def downgrade() -> None:
+    for name in SORT_INDEXES:
+        op.drop_index(name, table_name='exercises')
+    # The 0004 triggers only differ by the rating_avg updates; running them against
+    # a table without the column would fail, so restore them before dropping it
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        statements = {
+            'ratings_stats_ai': f"""CREATE TRIGGER ratings_stats_ai AFTER INSERT ON ratings BEGIN
+                {add_rating("new")};
+            END""",
+            'ratings_stats_au': f"""CREATE TRIGGER ratings_stats_au AFTER UPDATE OF value, exercise_id ON ratings BEGIN
+                {remove_rating("old")};
+                {add_rating("new")};
+            END""",
+            'ratings_stats_ad': f"""CREATE TRIGGER ratings_stats_ad AFTER DELETE ON ratings BEGIN
+                {remove_rating("old")};
+            END""",
+        }
+        for trigger, statement in statements.items():
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute(POSTGRESQL_FUNCTION.replace(f"{refresh_average('OLD')};", "")
+                   .replace(f"{refresh_average('NEW')};", ""))
+    with op.batch_alter_table('exercises') as batch_op:
+        batch_op.drop_column('rating_avg')
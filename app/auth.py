@@ -1,12 +1,20 @@
+import hashlib
+import os
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt, ExpiredSignatureError
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
-from . import models, schemas
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from starlette.concurrency import run_in_threadpool
+from . import models, schemas, cache
+from .bounded_executor import BoundedExecutor, PoolFullError
 from .database import get_db
+from .exceptions import ErrorMessage, service_unavailable_error
+from .local_cache import LocalCache
 
 # JWT configuration
 SECRET_KEY = "your-secret-key-for-jwt"  # In production, use environment variable
@@ -14,10 +22,48 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
-# Password hashing configuration
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing configuration. The first scheme hashes new passwords; hashes made with
+# any other listed scheme, or with a different bcrypt cost, are upgraded at the next login.
+PASSWORD_SCHEMES = [scheme.strip() for scheme in os.getenv("PASSWORD_SCHEMES", "bcrypt").split(",") if scheme.strip()]
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+def build_crypt_context(schemes: Optional[List[str]] = None, bcrypt_rounds: Optional[int] = None) -> CryptContext:
+    """Build a password context for the given schemes and bcrypt cost"""
+    schemes = schemes or PASSWORD_SCHEMES
+    rounds = bcrypt_rounds or BCRYPT_ROUNDS
+    settings = {}
+    if "bcrypt" in schemes:
+        # Pinning min and max makes needs_update flag hashes at any other cost
+        settings.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds)
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
+pwd_context = build_crypt_context()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
 
+# Dedicated pool for bcrypt so login bursts cannot starve the threadpool serving
+# every other sync route; requests beyond workers + queue are shed with 503
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_POOL_QUEUE = int(os.getenv("PASSWORD_POOL_QUEUE", "32"))
+PASSWORD_POOL_RETRY_AFTER = 1
+
+password_pool = BoundedExecutor(PASSWORD_POOL_WORKERS, PASSWORD_POOL_QUEUE, name="password")
+
+# Principal cache: the authenticated user's columns (never the password hash) by user id,
+# in process first and then in Redis, so steady-state requests skip the users table
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_FIELDS = ("id", "username", "created_at", "updated_at")
+# Changes to these columns must be seen by the next request
+PRINCIPAL_INVALIDATING_FIELDS = ("username", "hashed_password")
+
+principal_cache = LocalCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+cache.register_local_tier(principal_cache)
+
+# Verified token payloads by token digest, each kept until the token's exp,
+# so repeat callers skip signature verification and claim parsing
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+token_cache = LocalCache(TOKEN_CACHE_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -26,6 +72,27 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password, also returning a new hash if the stored one uses outdated settings"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def _upgrade_password_hash(db: Session, user: models.User, new_hash: str) -> None:
+    user.hashed_password = new_hash
+    db.commit()
+
+async def _run_password_pool(fn, *args):
+    try:
+        return await password_pool.run(fn, *args)
+    except PoolFullError:
+        raise service_unavailable_error(ErrorMessage.PASSWORD_POOL_FULL, PASSWORD_POOL_RETRY_AFTER)
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate a password hash on the password pool"""
+    return await _run_password_pool(get_password_hash, password)
+
+def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
+    return db.query(models.User).filter(models.User.username == username).first()
+
 def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     """Create a new user"""
     hashed_password = get_password_hash(user.password)
@@ -36,10 +103,27 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     return db_user
 
 def authenticate_user(db: Session, username: str, password: str) -> Optional[models.User]:
-    """Authenticate a user"""
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+    """Authenticate a user, rehashing the password if its hash is outdated"""
+    user = get_user_by_username(db, username)
+    if not user:
+        return None
+    verified, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        _upgrade_password_hash(db, user, new_hash)
+    return user
+
+async def authenticate_user_async(db: Session, username: str, password: str) -> Optional[models.User]:
+    """Authenticate a user from an async route: the lookup runs on the threadpool, bcrypt on the password pool"""
+    user = await run_in_threadpool(get_user_by_username, db, username)
+    if not user:
+        return None
+    verified, new_hash = await _run_password_pool(verify_and_update_password, password, user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        await run_in_threadpool(_upgrade_password_hash, db, user, new_hash)
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -64,10 +148,21 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _decode_token(token: str) -> dict:
+    """Decode and verify a token, reusing the payload from an earlier verification"""
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        ttl = payload.get("exp", 0) - time.time()
+        if ttl > 0:
+            token_cache.set(key, payload, ttl)
+    return dict(payload)
+
 def verify_token(token: str, refresh_token: bool = False) -> dict:
     """Verify and decode a token"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_token(token)
         if refresh_token and not payload.get("refresh"):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -85,6 +180,56 @@ def verify_token(token: str, refresh_token: bool = False) -> dict:
             detail="Could not validate credentials"
         )
 
+def _principal_key(user_id: str) -> str:
+    return cache.generate_key(cache.USER_PREFIX, user_id)
+
+def get_cached_principal(user_id: str) -> Optional[dict]:
+    """Get a cached principal from the in-process tier, falling back to Redis"""
+    key = _principal_key(user_id)
+    data = principal_cache.get(key)
+    if data is None:
+        data = cache.cache_get(key)
+        if data is not None:
+            principal_cache.set(key, data)
+    return data
+
+def cache_principal(user: models.User) -> None:
+    """Cache the user's principal columns in both tiers"""
+    data = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+    for field in ("created_at", "updated_at"):
+        data[field] = data[field].isoformat() if data[field] else None
+    key = _principal_key(user.id)
+    cache.cache_set(key, data, PRINCIPAL_CACHE_TTL)
+    principal_cache.set(key, data)
+
+def invalidate_principal(user_id: str) -> None:
+    """Drop a cached principal here, in Redis and in other workers' in-process tiers"""
+    key = _principal_key(user_id)
+    principal_cache.delete(key)
+    cache.cache_delete(key)
+
+def _principal_to_user(db: Session, data: dict) -> models.User:
+    """Attach a cached principal to the session without loading it.
+    Relationships still lazy-load; the password hash loads only if accessed."""
+    user = models.User(
+        id=data["id"],
+        username=data["username"],
+        created_at=datetime.fromisoformat(data["created_at"]) if data["created_at"] else None,
+        updated_at=datetime.fromisoformat(data["updated_at"]) if data["updated_at"] else None
+    )
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+@event.listens_for(models.User, "after_update")
+def _invalidate_updated_principal(mapper, connection, target: models.User) -> None:
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in PRINCIPAL_INVALIDATING_FIELDS):
+        invalidate_principal(target.id)
+
+@event.listens_for(models.User, "after_delete")
+def _invalidate_deleted_principal(mapper, connection, target: models.User) -> None:
+    invalidate_principal(target.id)
+
 def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> models.User:
     """Get current user from token"""
     if not token:
@@ -99,12 +244,22 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if user is None:
+    # Tokens without a user id (issued before the principal cache) are looked up by username
+    user_id: Optional[str] = payload.get("uid")
+    if user_id is None:
+        user = db.query(models.User).filter(models.User.username == username).first()
+    else:
+        data = get_cached_principal(user_id)
+        if data is not None and data["username"] == username:
+            return _principal_to_user(db, data)
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+    if user is None or user.username != username:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
+    if user_id is not None:
+        cache_principal(user)
     return user
 
 def get_optional_current_user(db: Session = Depends(get_db), token: Optional[str] = Depends(oauth2_scheme)) -> Optional[models.User]:
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+class PoolFullError(Exception):
+    """Raised instead of queueing work when the pool's admission queue is full"""
+
+class BoundedExecutor:
+    """Thread pool with a bounded admission queue.
+
+    At most max_workers calls run at once and at most max_queue more wait for a
+    worker; anything beyond that is rejected immediately with PoolFullError.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str = "bounded"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Queue a call, raising PoolFullError if no slot is free"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PoolFullError(f"{self.max_workers} running and {self.max_queue} queued")
+        with self._lock:
+            self._admitted += 1
+        try:
+            return self._executor.submit(self._run, fn, *args)
+        except BaseException:
+            self._release(completed=False)
+            raise
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a call on the pool without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            self._active += 1
+        try:
+            return fn(*args)
+        finally:
+            # Free the slot before the result is published so callers see it released
+            with self._lock:
+                self._active -= 1
+            self._release()
+
+    def _release(self, completed: bool = True) -> None:
+        with self._lock:
+            self._admitted -= 1
+            self._completed += completed
+        self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": self._admitted - self._active,
+                "completed": self._completed,
+                "rejected": self._rejected
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
@@ -1,28 +1,176 @@
 import json
+import math
 import os
-from typing import Any, Optional, Union
+import random
+import threading
+import time
+import uuid
+import asyncio
+import weakref
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
 from redis import Redis
+from redis import asyncio as redis_asyncio
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
 from datetime import timedelta
+from .local_cache import LocalCache, TierStats
+from .single_flight import AsyncSingleFlight, SingleFlight
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+# Short timeouts so a slow or unreachable Redis costs milliseconds, not seconds
+REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', '0.25'))
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', '0.5'))
 
 # Redis client instance
 redis_client = Redis.from_url(
-    os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
-    decode_responses=True  # Automatically decode responses to strings
+    REDIS_URL,
+    decode_responses=True,  # Automatically decode responses to strings
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+    socket_timeout=REDIS_SOCKET_TIMEOUT
+)
+
+# Async clients are bound to the event loop they were created on
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, redis_asyncio.Redis]" = weakref.WeakKeyDictionary()
+
+def get_async_redis() -> redis_asyncio.Redis:
+    """Get the redis.asyncio client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = redis_asyncio.Redis.from_url(
+            REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+            socket_timeout=REDIS_SOCKET_TIMEOUT
+        )
+        _async_clients[loop] = client
+    return client
+
+# Circuit breaker: after this many consecutive connection failures, cache calls
+# skip Redis until a probe after the recovery timeout succeeds
+redis_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv('REDIS_BREAKER_FAILURE_THRESHOLD', '5')),
+    recovery_timeout=float(os.getenv('REDIS_BREAKER_RECOVERY_TIMEOUT', '10'))
 )
 
+@contextmanager
+def redis_call():
+    """Guard a Redis round trip with the circuit breaker.
+    Raises CircuitOpenError without touching Redis while the circuit is open."""
+    if not redis_breaker.allow():
+        raise CircuitOpenError("Redis circuit is open")
+    try:
+        yield
+    except (RedisConnectionError, RedisTimeoutError):
+        redis_breaker.record_failure()
+        raise
+    except Exception:
+        # Redis answered, e.g. with a command error, so it is reachable
+        redis_breaker.record_success()
+        raise
+    except BaseException:
+        # Cancelled or interrupted mid-call: no verdict on Redis, but free the half-open probe slot
+        redis_breaker.release()
+        raise
+    redis_breaker.record_success()
+
+# Optional per-worker in-process tier in front of Redis (disabled when size is 0)
+LOCAL_CACHE_SIZE = int(os.getenv('LOCAL_CACHE_SIZE', '0'))
+LOCAL_CACHE_TTL = float(os.getenv('LOCAL_CACHE_TTL', '30'))
+INVALIDATION_CHANNEL = "cache:invalidate"
+WORKER_ID = uuid.uuid4().hex
+
+local_cache = LocalCache(LOCAL_CACHE_SIZE, LOCAL_CACHE_TTL) if LOCAL_CACHE_SIZE > 0 else None
+
+# Other in-process tiers (e.g. the auth principal cache) kept coherent over the same channel
+_registered_tiers: List[LocalCache] = []
+_listener_thread: Optional[threading.Thread] = None
+
+# The invalidation subscriber blocks on reads, so it gets a client without a read timeout
+pubsub_client = Redis.from_url(
+    REDIS_URL,
+    decode_responses=True,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT
+)
+redis_stats = TierStats()
+
+# Stampede protection: how long a recompute lock is held at most, how long
+# other callers wait for its result, and the XFetch early-refresh factor
+CACHE_LOCK_TIMEOUT = float(os.getenv('CACHE_LOCK_TIMEOUT', '5'))
+CACHE_LOCK_WAIT = float(os.getenv('CACHE_LOCK_WAIT', '2'))
+CACHE_LOCK_POLL_INTERVAL = 0.025
+XFETCH_BETA = float(os.getenv('XFETCH_BETA', '1.0'))
+
+single_flight = SingleFlight()
+async_single_flight = AsyncSingleFlight()
+
 # Key prefixes for different types of data
 EXERCISE_PREFIX = "exercise:"
 USER_PREFIX = "user:"
-COUNT_PREFIX = "count:"
+LOCK_PREFIX = "lock:"
+DELTA_PREFIX = "xfetch:"
+
+EXERCISE_CACHE_TTL = 3600
 
 def generate_key(prefix: str, id: str) -> str:
     """Generate a Redis key with the given prefix and ID"""
     return f"{prefix}{id}"
 
+def _expire_seconds(expire: Optional[Union[int, timedelta]]) -> Optional[float]:
+    return expire.total_seconds() if isinstance(expire, timedelta) else expire
+
+def _get_raw(key: str) -> Optional[str]:
+    """Get a raw value from the local tier, falling back to Redis"""
+    if local_cache is not None:
+        value = local_cache.get(key)
+        if value is not None:
+            return value
+    with redis_call():
+        value = redis_client.get(key)
+    redis_stats.record(value is not None)
+    if value is not None and local_cache is not None:
+        local_cache.set(key, value)
+    return value
+
+def _get_many_raw(keys: List[str]) -> List[Optional[str]]:
+    """Get raw values for several keys: local tier first, then one MGET for the rest"""
+    values = {key: local_cache.get(key) for key in keys} if local_cache is not None else {}
+    missing = [key for key in keys if values.get(key) is None]
+    if missing:
+        with redis_call():
+            fetched = redis_client.mget(missing)
+        for key, value in zip(missing, fetched):
+            redis_stats.record(value is not None)
+            values[key] = value
+            if value is not None and local_cache is not None:
+                local_cache.set(key, value)
+    return [values[key] for key in keys]
+
+async def _async_get_many_raw(keys: List[str]) -> List[Optional[str]]:
+    """_get_many_raw over redis.asyncio"""
+    values = {key: local_cache.get(key) for key in keys} if local_cache is not None else {}
+    missing = [key for key in keys if values.get(key) is None]
+    if missing:
+        with redis_call():
+            fetched = await get_async_redis().mget(missing)
+        for key, value in zip(missing, fetched):
+            redis_stats.record(value is not None)
+            values[key] = value
+            if value is not None and local_cache is not None:
+                local_cache.set(key, value)
+    return [values[key] for key in keys]
+
+def _publish_invalidation(pipe, keys: List[str]) -> None:
+    """Queue an invalidation message for other workers' local tiers on a pipeline"""
+    if _local_tiers():
+        pipe.publish(INVALIDATION_CHANNEL, json.dumps({"worker": WORKER_ID, "keys": keys}))
+
 def cache_get(key: str) -> Optional[dict]:
     """Get a value from cache"""
     try:
-        data = redis_client.get(key)
+        data = _get_raw(key)
         return json.loads(data) if data else None
     except Exception:
         return None
@@ -30,7 +178,14 @@ def cache_get(key: str) -> Optional[dict]:
 def cache_set(key: str, value: Any, expire: Optional[Union[int, timedelta]] = None) -> bool:
     """Set a value in cache with optional expiration"""
     try:
-        redis_client.set(key, json.dumps(value), ex=expire)
+        data = json.dumps(value)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(key, data, ex=expire)
+        _publish_invalidation(pipe, [key])
+        with redis_call():
+            pipe.execute()
+        if local_cache is not None:
+            local_cache.set(key, data, _expire_seconds(expire))
         return True
     except Exception:
         return False
@@ -38,7 +193,13 @@ def cache_set(key: str, value: Any, expire: Optional[Union[int, timedelta]] = No
 def cache_delete(key: str) -> bool:
     """Delete a value from cache"""
     try:
-        redis_client.delete(key)
+        if local_cache is not None:
+            local_cache.delete(key)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.delete(key)
+        _publish_invalidation(pipe, [key])
+        with redis_call():
+            pipe.execute()
         return True
     except Exception:
         return False
@@ -46,50 +207,413 @@ def cache_delete(key: str) -> bool:
 def cache_increment(key: str, amount: int = 1) -> Optional[int]:
     """Increment a counter in cache"""
     try:
-        return redis_client.incrby(key, amount)
+        if local_cache is not None:
+            local_cache.delete(key)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.incrby(key, amount)
+        _publish_invalidation(pipe, [key])
+        with redis_call():
+            return pipe.execute()[0]
     except Exception:
         return None
 
 def cache_decrement(key: str, amount: int = 1) -> Optional[int]:
     """Decrement a counter in cache"""
+    return cache_increment(key, -amount)
+
+# Stampede protection
+def acquire_locks(keys: List[str], timeout: float = None) -> Dict[str, str]:
+    """Try to take the recompute lock for each key in one pipeline.
+    Returns a token for every key whose lock was acquired."""
+    if not keys:
+        return {}
+    tokens = {key: uuid.uuid4().hex for key in keys}
     try:
-        return redis_client.decrby(key, amount)
+        pipe = redis_client.pipeline(transaction=False)
+        for key, token in tokens.items():
+            pipe.set(f"{LOCK_PREFIX}{key}", token, nx=True, px=int((timeout or CACHE_LOCK_TIMEOUT) * 1000))
+        with redis_call():
+            acquired = pipe.execute()
+    except Exception:
+        return {}
+    return {key: token for (key, token), ok in zip(tokens.items(), acquired) if ok}
+
+def release_locks(tokens: Dict[str, str]) -> None:
+    """Release locks still held with the given tokens.
+    A lock that expired and was re-acquired in between may be released early;
+    that only costs a duplicate recompute."""
+    if not tokens:
+        return
+    try:
+        lock_keys = [f"{LOCK_PREFIX}{key}" for key in tokens]
+        with redis_call():
+            held = redis_client.mget(lock_keys)
+        mine = [lock_key for lock_key, token, value in zip(lock_keys, tokens.values(), held) if value == token]
+        if mine:
+            with redis_call():
+                redis_client.delete(*mine)
+    except Exception:
+        pass
+
+def wait_for_keys(keys: List[str], timeout: float = None) -> Dict[str, str]:
+    """Poll until the given keys are filled by the lock holders or the wait times out.
+    Returns the raw values that appeared."""
+    found: Dict[str, str] = {}
+    deadline = time.monotonic() + (CACHE_LOCK_WAIT if timeout is None else timeout)
+    pending = list(keys)
+    try:
+        while pending and time.monotonic() < deadline:
+            time.sleep(CACHE_LOCK_POLL_INTERVAL)
+            with redis_call():
+                values = redis_client.mget(pending)
+            for key, value in zip(pending, values):
+                if value is not None:
+                    found[key] = value
+            pending = [key for key in pending if key not in found]
+    except Exception:
+        pass
+    return found
+
+def _should_refresh_early(ttl_ms: int, delta: Optional[str], beta: float) -> bool:
+    """XFetch: refresh before expiry with a probability that grows as expiry nears
+    and with how long the value took to compute"""
+    if ttl_ms is None or ttl_ms < 0 or not delta:
+        return False
+    return float(delta) * beta * -math.log(1.0 - random.random()) >= ttl_ms / 1000
+
+def _compute_and_store(key: str, compute: Callable[[], Any], expire: Optional[int]) -> Any:
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    data = json.dumps(value)
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(key, data, ex=expire)
+        if expire:
+            pipe.set(f"{DELTA_PREFIX}{key}", delta, ex=expire)
+        _publish_invalidation(pipe, [key])
+        with redis_call():
+            pipe.execute()
+    except Exception:
+        pass
+    if local_cache is not None:
+        local_cache.set(key, data, _expire_seconds(expire))
+    return value
+
+def _compute_with_lock(key: str, compute: Callable[[], Any], expire: Optional[int]) -> Any:
+    tokens = acquire_locks([key])
+    if not tokens:
+        # Someone else is recomputing this key; use their result if it arrives in time
+        data = wait_for_keys([key]).get(key)
+        if data is not None:
+            return json.loads(data)
+    try:
+        return _compute_and_store(key, compute, expire)
+    finally:
+        release_locks(tokens)
+
+def get_or_compute(
+    key: str,
+    compute: Callable[[], Any],
+    expire: Optional[int] = None,
+    beta: float = None
+) -> Any:
+    """Read-through get with stampede protection.
+    On a miss only one caller recomputes the value: callers in this process share
+    one computation and other processes wait on a Redis lock. Keys with an expiry
+    are refreshed early (XFetch) by a single caller while the others keep serving
+    the current value. Exceptions from compute propagate to every waiting caller."""
+    if local_cache is not None:
+        data = local_cache.get(key)
+        if data is not None:
+            return json.loads(data)
+
+    data = None
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.pttl(key)
+        pipe.get(f"{DELTA_PREFIX}{key}")
+        with redis_call():
+            data, ttl_ms, delta = pipe.execute()
+        redis_stats.record(data is not None)
+        value = json.loads(data) if data else None
+    except Exception:
+        data = None
+
+    if data is not None:
+        if not (expire and _should_refresh_early(ttl_ms, delta, XFETCH_BETA if beta is None else beta)):
+            if local_cache is not None:
+                local_cache.set(key, data, ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else None)
+            return value
+        tokens = acquire_locks([key])
+        if not tokens:
+            return value
+        try:
+            return _compute_and_store(key, compute, expire)
+        finally:
+            release_locks(tokens)
+
+    return single_flight.do(key, lambda: _compute_with_lock(key, compute, expire))
+
+# The same stampede protection for coroutines, over redis.asyncio
+async def _async_acquire_lock(key: str) -> Optional[str]:
+    token = uuid.uuid4().hex
+    try:
+        with redis_call():
+            acquired = await get_async_redis().set(
+                f"{LOCK_PREFIX}{key}", token, nx=True, px=int(CACHE_LOCK_TIMEOUT * 1000)
+            )
     except Exception:
         return None
+    return token if acquired else None
+
+async def _async_release_lock(key: str, token: Optional[str]) -> None:
+    if token is None:
+        return
+    try:
+        client = get_async_redis()
+        with redis_call():
+            if await client.get(f"{LOCK_PREFIX}{key}") == token:
+                await client.delete(f"{LOCK_PREFIX}{key}")
+    except Exception:
+        pass
+
+async def _async_wait_for_key(key: str) -> Optional[str]:
+    deadline = time.monotonic() + CACHE_LOCK_WAIT
+    try:
+        while time.monotonic() < deadline:
+            await asyncio.sleep(CACHE_LOCK_POLL_INTERVAL)
+            with redis_call():
+                value = await get_async_redis().get(key)
+            if value is not None:
+                return value
+    except Exception:
+        pass
+    return None
+
+async def _async_compute_and_store(key: str, compute: Callable[[], Awaitable[Any]], expire: Optional[int]) -> Any:
+    started = time.monotonic()
+    value = await compute()
+    delta = time.monotonic() - started
+    data = json.dumps(value)
+    try:
+        pipe = get_async_redis().pipeline(transaction=False)
+        pipe.set(key, data, ex=expire)
+        if expire:
+            pipe.set(f"{DELTA_PREFIX}{key}", delta, ex=expire)
+        _publish_invalidation(pipe, [key])
+        with redis_call():
+            await pipe.execute()
+    except Exception:
+        pass
+    if local_cache is not None:
+        local_cache.set(key, data, _expire_seconds(expire))
+    return value
+
+async def _async_compute_with_lock(key: str, compute: Callable[[], Awaitable[Any]], expire: Optional[int]) -> Any:
+    token = await _async_acquire_lock(key)
+    if token is None:
+        data = await _async_wait_for_key(key)
+        if data is not None:
+            return json.loads(data)
+    try:
+        return await _async_compute_and_store(key, compute, expire)
+    finally:
+        await _async_release_lock(key, token)
+
+async def async_get_or_compute(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    expire: Optional[int] = None,
+    beta: float = None
+) -> Any:
+    """get_or_compute for async routes: compute is awaited and Redis is reached through redis.asyncio"""
+    if local_cache is not None:
+        data = local_cache.get(key)
+        if data is not None:
+            return json.loads(data)
+
+    data = None
+    try:
+        pipe = get_async_redis().pipeline(transaction=False)
+        pipe.get(key)
+        pipe.pttl(key)
+        pipe.get(f"{DELTA_PREFIX}{key}")
+        with redis_call():
+            data, ttl_ms, delta = await pipe.execute()
+        redis_stats.record(data is not None)
+        value = json.loads(data) if data else None
+    except Exception:
+        data = None
+
+    if data is not None:
+        if not (expire and _should_refresh_early(ttl_ms, delta, XFETCH_BETA if beta is None else beta)):
+            if local_cache is not None:
+                local_cache.set(key, data, ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else None)
+            return value
+        token = await _async_acquire_lock(key)
+        if token is None:
+            return value
+        try:
+            return await _async_compute_and_store(key, compute, expire)
+        finally:
+            await _async_release_lock(key, token)
+
+    return await async_single_flight.do(key, lambda: _async_compute_with_lock(key, compute, expire))
 
 # Exercise-specific cache functions
 def get_cached_exercise(exercise_id: str) -> Optional[dict]:
     """Get an exercise from cache"""
     return cache_get(generate_key(EXERCISE_PREFIX, exercise_id))
 
-def cache_exercise(exercise_id: str, exercise_data: dict, expire: int = 3600) -> bool:
+def cache_exercise(exercise_id: str, exercise_data: dict, expire: int = EXERCISE_CACHE_TTL) -> bool:
     """Cache an exercise for 1 hour by default"""
     return cache_set(generate_key(EXERCISE_PREFIX, exercise_id), exercise_data, expire)
 
+async def async_get_cached_exercises(exercise_ids: List[str]) -> Dict[str, dict]:
+    """Get several exercises from cache with a single MGET; misses are absent from the result"""
+    if not exercise_ids:
+        return {}
+    try:
+        values = await _async_get_many_raw([generate_key(EXERCISE_PREFIX, exercise_id) for exercise_id in exercise_ids])
+    except Exception:
+        return {}
+    return {exercise_id: json.loads(value) for exercise_id, value in zip(exercise_ids, values) if value}
+
+async def async_cache_exercises(exercises: Dict[str, dict], expire: int = EXERCISE_CACHE_TTL) -> bool:
+    """Cache several exercises keyed by id in one pipeline"""
+    if not exercises:
+        return True
+    try:
+        keys = {generate_key(EXERCISE_PREFIX, exercise_id): json.dumps(data)
+                for exercise_id, data in exercises.items()}
+        pipe = get_async_redis().pipeline(transaction=False)
+        for key, data in keys.items():
+            pipe.set(key, data, ex=expire)
+        _publish_invalidation(pipe, list(keys))
+        with redis_call():
+            await pipe.execute()
+        if local_cache is not None:
+            for key, data in keys.items():
+                local_cache.set(key, data, expire)
+        return True
+    except Exception:
+        return False
+
+async def async_get_or_compute_exercise(
+    exercise_id: str,
+    compute: Callable[[], Awaitable[dict]],
+    expire: int = EXERCISE_CACHE_TTL
+) -> dict:
+    """Get an exercise from cache, computing it with stampede protection on a miss"""
+    return await async_get_or_compute(generate_key(EXERCISE_PREFIX, exercise_id), compute, expire)
+
 def invalidate_exercise_cache(exercise_id: str) -> bool:
     """Invalidate exercise cache"""
     return cache_delete(generate_key(EXERCISE_PREFIX, exercise_id))
 
-# Counter cache functions
-def get_cached_count(count_type: str, id: str) -> Optional[int]:
-    """Get a cached counter value"""
+def invalidate_exercises_cache(exercise_ids: Iterable[str]) -> bool:
+    """Invalidate several exercises with one pipelined DEL and one invalidation message"""
+    keys = [generate_key(EXERCISE_PREFIX, exercise_id) for exercise_id in exercise_ids]
+    if not keys:
+        return True
     try:
-        value = redis_client.get(generate_key(f"{COUNT_PREFIX}{count_type}:", id))
-        return int(value) if value else None
+        if local_cache is not None:
+            for key in keys:
+                local_cache.delete(key)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.delete(*keys)
+        _publish_invalidation(pipe, keys)
+        with redis_call():
+            pipe.execute()
+        return True
     except Exception:
-        return None
+        return False
+
+def clear_prefix(prefix: str, batch_size: int = 1000) -> int:
+    """Delete every key starting with prefix, batch_size keys per pipelined DEL.
+    Returns the number of keys deleted."""
+    deleted = 0
+    if local_cache is not None:
+        local_cache.clear()
+    try:
+        with redis_call():
+            batch = []
+            for key in redis_client.scan_iter(match=f"{prefix}*", count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    deleted += _delete_batch(batch)
+                    batch = []
+            if batch:
+                deleted += _delete_batch(batch)
+    except Exception:
+        pass
+    return deleted
+
+def _delete_batch(keys: List[str]) -> int:
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.delete(*keys)
+    _publish_invalidation(pipe, keys)
+    return pipe.execute()[0]
 
-def cache_count(count_type: str, id: str, value: int) -> bool:
-    """Cache a counter value"""
-    return cache_set(generate_key(f"{COUNT_PREFIX}{count_type}:", id), value)
+# Local tier invalidation across workers
+def register_local_tier(tier: LocalCache) -> None:
+    """Have invalidation messages from other workers also drop keys from this tier"""
+    _registered_tiers.append(tier)
 
-def increment_count(count_type: str, id: str) -> Optional[int]:
-    """Increment a cached counter"""
-    return cache_increment(generate_key(f"{COUNT_PREFIX}{count_type}:", id))
+def _local_tiers() -> List[LocalCache]:
+    return ([local_cache] if local_cache is not None else []) + _registered_tiers
 
-def decrement_count(count_type: str, id: str) -> Optional[int]:
-    """Decrement a cached counter"""
-    return cache_decrement(generate_key(f"{COUNT_PREFIX}{count_type}:", id))
+def _clear_local_tiers() -> None:
+    for tier in _local_tiers():
+        tier.clear()
+
+def handle_invalidation_message(data: str) -> None:
+    """Drop keys another worker changed from this worker's local tiers"""
+    tiers = _local_tiers()
+    if not tiers:
+        return
+    try:
+        message = json.loads(data)
+    except (TypeError, ValueError):
+        return
+    if message.get("worker") == WORKER_ID:
+        return
+    for key in message.get("keys", []):
+        for tier in tiers:
+            tier.delete(key)
+
+def _listen_for_invalidations() -> None:
+    while True:
+        try:
+            pubsub = pubsub_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Messages may have been missed while not subscribed
+            _clear_local_tiers()
+            for message in pubsub.listen():
+                handle_invalidation_message(message["data"])
+        except Exception:
+            _clear_local_tiers()
+            time.sleep(1)
+
+def start_invalidation_listener() -> Optional[threading.Thread]:
+    """Start the background subscriber that keeps the local tiers coherent (once per process)"""
+    global _listener_thread
+    if not _local_tiers():
+        return None
+    if _listener_thread is None or not _listener_thread.is_alive():
+        _listener_thread = threading.Thread(target=_listen_for_invalidations, name="cache-invalidation", daemon=True)
+        _listener_thread.start()
+    return _listener_thread
+
+def get_cache_stats() -> dict:
+    """Get hit ratios for each cache tier"""
+    return {
+        "local_enabled": local_cache is not None,
+        "local": local_cache.stats.as_dict() if local_cache is not None else None,
+        "redis": redis_stats.as_dict()
+    }
 
 # Health check function
 def check_redis_connection() -> tuple[bool, str]:
@@ -99,7 +623,25 @@ def check_redis_connection() -> tuple[bool, str]:
         tuple: (is_healthy: bool, message: str)
     """
     try:
-        redis_client.ping()
+        with redis_call():
+            redis_client.ping()
         return True, "Redis connection is healthy"
+    except CircuitOpenError:
+        return False, "Redis circuit breaker is open; cache calls are bypassing Redis"
     except Exception as e:
-        return False, f"Redis connection error: {str(e)}" 
\ No newline at end of file
+        return False, f"Redis connection error: {str(e)}" 
+
+async def async_check_redis_connection() -> tuple[bool, str]:
+    """Check Redis health without blocking the event loop"""
+    try:
+        with redis_call():
+            await get_async_redis().ping()
+        return True, "Redis connection is healthy"
+    except CircuitOpenError:
+        return False, "Redis circuit breaker is open; cache calls are bypassing Redis"
+    except Exception as e:
+        return False, f"Redis connection error: {str(e)}"
+
+def get_redis_breaker_state() -> dict:
+    """Get the Redis circuit breaker state"""
+    return redis_breaker.as_dict()
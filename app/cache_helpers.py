@@ -1,28 +1,62 @@
-from typing import Tuple
-from . import cache, models
+from typing import List, Optional, Set, Tuple
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from . import models
 
-def get_interaction_counts(exercise: models.Exercise) -> Tuple[int, int]:
-    """Get favorite and save counts for an exercise from cache or database"""
-    # Try to get counts from cache first
-    favorite_count = cache.get_cached_count("favorites", str(exercise.id))
-    save_count = cache.get_cached_count("saves", str(exercise.id))
-    
-    if favorite_count is None:
-        favorite_count = len(exercise.favorited_by)
-        cache.cache_count("favorites", str(exercise.id), favorite_count)
-    
-    if save_count is None:
-        save_count = len(exercise.saved_by)
-        cache.cache_count("saves", str(exercise.id), save_count)
-    
-    return favorite_count, save_count
+INTERACTION_MODELS = {
+    "favorites": models.Favorite,
+    "saves": models.Save,
+}
+
+def _interaction_ids_statement(user: models.User, exercise_ids: List[str]):
+    return union_all(*(
+        select(literal(count_type).label("count_type"), model.exercise_id)
+        .where(model.user_id == user.id, model.exercise_id.in_(exercise_ids))
+        for count_type, model in INTERACTION_MODELS.items()
+    ))
+
+def _split_interaction_ids(rows) -> Tuple[Set[str], Set[str]]:
+    favorited, saved = set(), set()
+    for count_type, exercise_id in rows:
+        (favorited if count_type == "favorites" else saved).add(exercise_id)
+    return favorited, saved
+
+def get_user_interaction_ids(
+    db: Session,
+    user: models.User,
+    exercise_ids: List[str]
+) -> Tuple[Set[str], Set[str]]:
+    """Get which of the given exercises the user has favorited and saved, in one query"""
+    if not exercise_ids:
+        return set(), set()
+    return _split_interaction_ids(db.execute(_interaction_ids_statement(user, exercise_ids)).all())
+
+async def async_get_user_interaction_ids(
+    db: AsyncSession,
+    user: models.User,
+    exercise_ids: List[str]
+) -> Tuple[Set[str], Set[str]]:
+    """get_user_interaction_ids on an AsyncSession"""
+    if not exercise_ids:
+        return set(), set()
+    return _split_interaction_ids((await db.execute(_interaction_ids_statement(user, exercise_ids))).all())
+
+def update_exercises_interaction_status(
+    db: Session,
+    exercises: List[models.Exercise],
+    current_user: Optional[models.User] = None
+) -> None:
+    """Update a page of exercises with the user's interaction status in one query.
+    Favorite/save counts are columns on the exercise rows themselves."""
+    exercise_ids = [str(exercise.id) for exercise in exercises]
+    if not exercise_ids or not current_user:
+        return
+    favorited, saved = get_user_interaction_ids(db, current_user, exercise_ids)
+    for exercise, exercise_id in zip(exercises, exercise_ids):
+        exercise.is_favorited = exercise_id in favorited
+        exercise.is_saved = exercise_id in saved
 
 def update_exercise_interaction_status(exercise: models.Exercise, current_user: models.User = None) -> None:
-    """Update exercise with interaction counts and user's interaction status"""
-    favorite_count, save_count = get_interaction_counts(exercise)
-    exercise.favorite_count = favorite_count
-    exercise.save_count = save_count
-    
-    if current_user:
-        exercise.is_favorited = exercise in current_user.favorite_exercises
-        exercise.is_saved = exercise in current_user.saved_exercises 
\ No newline at end of file
+    """Update exercise with user's interaction status"""
+    update_exercises_interaction_status(object_session(exercise), [exercise], current_user)
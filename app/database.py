@@ -1,5 +1,7 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import uuid
@@ -7,6 +9,16 @@ from sqlalchemy import TypeDecorator, String
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 
+def to_async_database_url(url: str) -> str:
+    """Map a sync database URL to the matching async driver (aiosqlite/asyncpg)"""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    return url
+
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_database_url(SQLALCHEMY_DATABASE_URL))
+
 class SQLiteUUID(TypeDecorator):
     """Platform-independent UUID type.
     Uses String(32) for SQLite, and native UUID for other databases.
@@ -43,16 +55,23 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+# SQLite connections are cheap to open, and not pooling them keeps the engine
+# usable from more than one event loop
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    **({"poolclass": NullPool} if ASYNC_SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {})
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
-# Create tables
-def create_tables():
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
+Base = declarative_base()
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close() 
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
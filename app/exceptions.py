@@ -6,6 +6,7 @@ class ErrorCode:
     FORBIDDEN = "FORBIDDEN"
     VALIDATION_ERROR = "VALIDATION_ERROR"
     ALREADY_EXISTS = "ALREADY_EXISTS"
+    SERVICE_UNAVAILABLE = "SERVICE_UNAVAILABLE"
 
 class ErrorMessage:
     EXERCISE_NOT_FOUND = "Exercise not found"
@@ -15,6 +16,14 @@ class ErrorMessage:
     UNAUTHORIZED_DELETE = "Not authorized to delete this resource"
     INVALID_INTERACTION_TYPE = "Invalid interaction type. Must be 'favorites' or 'saves'"
     INVALID_UUID = "Invalid UUID format"
+    INVALID_CURSOR = "Invalid or expired pagination cursor"
+    INVALID_SORT = "Invalid sort. Must be one of id, difficulty, created_at, favorite_count, rating, optionally prefixed with '-' for descending"
+    TOO_MANY_IDS = "Too many ids requested at once"
+    TOO_MANY_ITEMS = "Too many items in one bulk request"
+    INVALID_EXPORT_FORMAT = "Invalid export format. Must be 'ndjson' or 'csv'"
+    CONFLICTING_INTERACTION_CHANGES = "An exercise cannot be both added and removed"
+    INVALID_TRENDING_WINDOW = "Invalid trending window. Must be one of 1d, 7d, 30d"
+    PASSWORD_POOL_FULL = "Too many concurrent sign-ins, please retry shortly"
 
 def not_found_error(detail: str) -> HTTPException:
     return HTTPException(
@@ -49,4 +58,11 @@ def already_exists_error(detail: str) -> HTTPException:
         status_code=status.HTTP_409_CONFLICT,
         detail=detail,
         headers={"X-Error-Code": ErrorCode.ALREADY_EXISTS}
-    ) 
\ No newline at end of file
+    )
+
+def service_unavailable_error(detail: str, retry_after: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=detail,
+        headers={"X-Error-Code": ErrorCode.SERVICE_UNAVAILABLE, "Retry-After": str(retry_after)}
+    )
\ No newline at end of file
@@ -0,0 +1,183 @@
+import uuid
+from typing import Any, Dict, Iterator, List, Sequence, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+from .. import models, schemas, cache, cache_helpers, trending
+from ..exceptions import ErrorMessage
+from .exercise_helpers import has_exercise_access
+from .rating_helpers import DIALECT_INSERTS
+
+# Rows per INSERT/UPDATE/DELETE statement; one transaction covers the whole request
+BULK_CHUNK_SIZE = 500
+
+def chunked(items: Sequence, size: int = BULK_CHUNK_SIZE) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _error(index: int, detail: str, id: str = None) -> schemas.BulkItemResult:
+    return schemas.BulkItemResult(index=index, id=id, status="error", detail=detail)
+
+def _validate_items(
+    items: List[Dict[str, Any]],
+    schema: Type[BaseModel]
+) -> Tuple[List[Tuple[int, BaseModel]], Dict[int, schemas.BulkItemResult]]:
+    """Validate each item on its own so one bad item does not reject the batch"""
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as e:
+            errors[index] = _error(index, "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ), id=item.get("id") if isinstance(item, dict) else None)
+    return valid, errors
+
+def _bulk_result(size: int, results: Dict[int, schemas.BulkItemResult]) -> schemas.BulkResult:
+    ordered = [results[index] for index in range(size)]
+    failed = sum(result.status == "error" for result in ordered)
+    return schemas.BulkResult(results=ordered, succeeded=size - failed, failed=failed)
+
+def _load_exercise_access(db: Session, exercise_ids: List[str]) -> Dict[str, Any]:
+    """Load just what the permission checks need for many exercises, one IN query per chunk"""
+    found = {}
+    for chunk in chunked(exercise_ids):
+        rows = db.query(models.Exercise.id, models.Exercise.is_public, models.Exercise.creator_id).filter(
+            models.Exercise.id.in_(chunk)
+        )
+        found.update({row.id: row for row in rows})
+    return found
+
+def bulk_create_exercises(
+    db: Session,
+    items: List[Dict[str, Any]],
+    current_user: models.User
+) -> schemas.BulkResult:
+    """Validate items as ExerciseCreate and insert the valid ones with one executemany INSERT per chunk"""
+    valid, results = _validate_items(items, schemas.ExerciseCreate)
+    rows = [{**exercise.model_dump(), "id": str(uuid.uuid4()), "creator_id": current_user.id}
+            for _, exercise in valid]
+    table = models.Exercise.__table__
+    created_ids = []
+    for chunk in chunked(rows):
+        statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+        created_ids.extend(db.execute(statement, chunk).scalars())
+    db.commit()
+    for (index, _), exercise_id in zip(valid, created_ids):
+        results[index] = schemas.BulkItemResult(index=index, id=exercise_id, status="created")
+    return _bulk_result(len(items), results)
+
+def bulk_update_exercises(
+    db: Session,
+    items: List[Dict[str, Any]],
+    current_user: models.User
+) -> schemas.BulkResult:
+    """Apply partial updates by primary key, checking permissions like check_exercise_modification"""
+    valid, results = _validate_items(items, schemas.ExerciseBulkUpdate)
+    existing = _load_exercise_access(db, [item.id for _, item in valid])
+    updates, updated = [], []
+    for index, item in valid:
+        exercise = existing.get(item.id)
+        if exercise is None:
+            results[index] = _error(index, ErrorMessage.EXERCISE_NOT_FOUND, item.id)
+        elif not exercise.is_public and exercise.creator_id != current_user.id:
+            results[index] = _error(index, ErrorMessage.UNAUTHORIZED_UPDATE, item.id)
+        else:
+            changes = item.model_dump(exclude_unset=True, exclude={"id"})
+            if changes:
+                updates.append({**changes, "id": item.id})
+            updated.append((index, item.id))
+
+    # ORM bulk UPDATE by primary key groups rows that set the same columns into one executemany
+    for chunk in chunked(updates):
+        db.execute(update(models.Exercise), list(chunk))
+    db.commit()
+    cache.invalidate_exercises_cache(exercise_id for _, exercise_id in updated)
+    for index, exercise_id in updated:
+        results[index] = schemas.BulkItemResult(index=index, id=exercise_id, status="updated")
+    return _bulk_result(len(items), results)
+
+def bulk_delete_exercises(
+    db: Session,
+    exercise_ids: List[str],
+    current_user: models.User
+) -> schemas.BulkResult:
+    """Delete the user's own exercises among the ids, with their interactions, in one transaction"""
+    existing = _load_exercise_access(db, list(dict.fromkeys(exercise_ids)))
+    results, deleted = {}, []
+    for index, exercise_id in enumerate(exercise_ids):
+        exercise = existing.get(exercise_id)
+        if exercise is None:
+            results[index] = _error(index, ErrorMessage.EXERCISE_NOT_FOUND, exercise_id)
+        elif exercise.creator_id != current_user.id:
+            results[index] = _error(index, ErrorMessage.UNAUTHORIZED_DELETE, exercise_id)
+        else:
+            results[index] = schemas.BulkItemResult(index=index, id=exercise_id, status="deleted")
+            deleted.append(exercise_id)
+
+    deleted = list(dict.fromkeys(deleted))
+    for chunk in chunked(deleted):
+        # Core deletes skip the ORM cascades, and SQLite does not enforce ON DELETE CASCADE
+        for model in (models.Favorite, models.Save, models.Rating):
+            db.execute(delete(model).where(model.exercise_id.in_(chunk)))
+        db.execute(delete(models.Exercise).where(models.Exercise.id.in_(chunk)))
+    db.commit()
+    cache.invalidate_exercises_cache(deleted)
+    return _bulk_result(len(exercise_ids), results)
+
+def bulk_update_interactions(
+    db: Session,
+    current_user: models.User,
+    interaction_type: str,
+    add: List[str],
+    remove: List[str]
+) -> schemas.BulkInteractionResult:
+    """Add and remove many favorites/saves of the user in one transaction.
+    Adding a missing exercise or another user's private one is reported in failed.
+    Adds are one INSERT ... ON CONFLICT DO NOTHING and removes one DELETE ... IN per chunk;
+    RETURNING tells which rows really changed, and only those move the exercise counters."""
+    model = cache_helpers.INTERACTION_MODELS[interaction_type]
+    table = model.__table__
+    counter = models.Exercise.favorite_count if interaction_type == "favorites" else models.Exercise.save_count
+    add, remove = list(dict.fromkeys(add)), list(dict.fromkeys(remove))
+
+    existing = _load_exercise_access(db, add)
+    failed, rows = {}, []
+    for exercise_id in add:
+        exercise = existing.get(exercise_id)
+        if exercise is None:
+            failed[exercise_id] = ErrorMessage.EXERCISE_NOT_FOUND
+        elif not has_exercise_access(exercise, current_user):
+            failed[exercise_id] = ErrorMessage.UNAUTHORIZED_ACCESS
+        else:
+            rows.append({"id": str(uuid.uuid4()), "user_id": current_user.id, "exercise_id": exercise_id})
+
+    insert_ = DIALECT_INSERTS[db.get_bind().dialect.name]
+    added, removed_rows = [], []
+    for chunk in chunked(rows):
+        statement = insert_(table).on_conflict_do_nothing(
+            index_elements=[table.c.user_id, table.c.exercise_id]
+        ).returning(table.c.exercise_id)
+        added.extend(db.execute(statement, chunk).scalars())
+    for chunk in chunked(remove):
+        statement = delete(table).where(
+            table.c.user_id == current_user.id, table.c.exercise_id.in_(chunk)
+        ).returning(table.c.exercise_id, table.c.created_at)
+        removed_rows.extend(db.execute(statement).tuples())
+    removed = [exercise_id for exercise_id, _ in removed_rows]
+
+    for exercise_ids, delta in ((added, 1), (removed, -1)):
+        for chunk in chunked(exercise_ids):
+            db.execute(
+                update(models.Exercise)
+                .where(models.Exercise.id.in_(chunk))
+                .values({counter: counter + delta, models.Exercise.updated_at: models.Exercise.updated_at})
+                .execution_options(synchronize_session=False)
+            )
+    db.commit()
+
+    # Cache invalidation and leaderboard updates are batched as well
+    cache.invalidate_exercises_cache(added + removed)
+    trending.record_interactions(interaction_type, added, removed_rows)
+    return schemas.BulkInteractionResult(added=added, removed=removed, failed=failed)
+
@@ -1,7 +1,71 @@
-from sqlalchemy.orm import Session
-from .. import models, cache, cache_helpers
-from ..exceptions import not_found_error, forbidden_error, ErrorMessage
-from typing import Optional
+import uuid
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, Query, object_session
+from .. import models, schemas, cache, cache_helpers, search, trending
+from ..exceptions import not_found_error, forbidden_error, validation_error, ErrorMessage
+from .rating_helpers import (
+    DIALECT_INSERTS,
+    update_exercises_rating_status,
+    update_exercises_rating_aggregates,
+    update_exercises_user_rating
+)
+from typing import Dict, List, Optional, Tuple
+
+# Keyset orderings for cursor pagination and sort=; the trailing id makes each order total.
+# Each one has an index on exactly these columns (see models.Exercise.__table_args__).
+EXERCISE_KEYSET_ORDERS = {
+    "id": (models.Exercise.id,),
+    "difficulty": (models.Exercise.difficulty_level, models.Exercise.name, models.Exercise.id),
+    "created_at": (models.Exercise.created_at, models.Exercise.id),
+    "favorite_count": (models.Exercise.favorite_count, models.Exercise.id),
+    "rating": (models.Exercise.rating_avg, models.Exercise.id),
+}
+
+# Per-user fields set per request on top of the cached exercise payload
+EXERCISE_OVERLAY_FIELDS = {"is_favorited", "is_saved", "user_rating"}
+
+# Ranked ids fetched per visible exercise wanted when filtering the trending list
+TRENDING_OVERFETCH = 2
+
+def build_exercise_query(
+    db: Session,
+    current_user: Optional[models.User] = None,
+    name: Optional[str] = None,
+    description: Optional[str] = None,
+    difficulty_level: Optional[int] = None,
+    q: Optional[str] = None,
+    rank_by_relevance: bool = False
+) -> Query:
+    """Build the exercise listing query with visibility rules and filters applied.
+    q is matched against the full-text search index; rank_by_relevance orders by match quality."""
+    # Public exercises, plus the user's own private exercises when authenticated
+    if current_user:
+        query = db.query(models.Exercise).filter(
+            (models.Exercise.is_public == True) |
+            (models.Exercise.creator_id == current_user.id)
+        )
+    else:
+        query = db.query(models.Exercise).filter(models.Exercise.is_public == True)
+
+    if name:
+        query = query.filter(models.Exercise.name.ilike(f"%{name}%"))
+    if description:
+        query = query.filter(models.Exercise.description.ilike(f"%{description}%"))
+    if difficulty_level:
+        query = query.filter(models.Exercise.difficulty_level == difficulty_level)
+    if q:
+        query = search.apply_search(query, q, rank=rank_by_relevance)
+    return query
+
+def parse_exercise_sort(sort: str) -> Tuple[Tuple, bool]:
+    """Resolve a sort= value such as "rating" or "-favorite_count" to its keyset columns
+    and whether the order is descending"""
+    descending = sort.startswith("-")
+    columns = EXERCISE_KEYSET_ORDERS.get(sort[1:] if descending else sort)
+    if columns is None:
+        raise validation_error(ErrorMessage.INVALID_SORT)
+    return columns, descending
 
 def get_exercise_or_404(db: Session, exercise_id: str) -> models.Exercise:
     """Get exercise by ID or raise 404 error"""
@@ -10,11 +74,109 @@ def get_exercise_or_404(db: Session, exercise_id: str) -> models.Exercise:
         raise not_found_error(ErrorMessage.EXERCISE_NOT_FOUND)
     return exercise
 
+# Detail reads run on an AsyncSession and read the cache through redis.asyncio
+async def serialize_exercises(db: AsyncSession, exercises: List[models.Exercise]) -> Dict[str, dict]:
+    """Cacheable payloads by id: everything but the per-user fields.
+    The rating aggregates of all the exercises come from one query."""
+    await update_exercises_rating_aggregates(db, exercises)
+    return {
+        exercise.id: schemas.Exercise.model_validate(exercise).model_dump(mode="json", exclude=EXERCISE_OVERLAY_FIELDS)
+        for exercise in exercises
+    }
+
+async def get_exercise_payload(db: AsyncSession, exercise_id: str) -> dict:
+    """Get the serialized exercise from cache, loading and caching it on a miss.
+    The payload holds no per-user fields, so it is shared by all callers."""
+    async def load() -> dict:
+        exercise = await db.get(models.Exercise, exercise_id)
+        if not exercise:
+            raise not_found_error(ErrorMessage.EXERCISE_NOT_FOUND)
+        return (await serialize_exercises(db, [exercise]))[exercise.id]
+    return await cache.async_get_or_compute_exercise(exercise_id, load)
+
+async def update_exercises_user_fields(
+    db: AsyncSession,
+    exercises: List[schemas.Exercise],
+    current_user: Optional[models.User] = None
+) -> None:
+    """Set the user's favorite/save status and rating on exercises built from cached payloads"""
+    if not current_user or not exercises:
+        return
+    favorited, saved = await cache_helpers.async_get_user_interaction_ids(
+        db, current_user, [exercise.id for exercise in exercises]
+    )
+    for exercise in exercises:
+        exercise.is_favorited = exercise.id in favorited
+        exercise.is_saved = exercise.id in saved
+    await update_exercises_user_rating(db, exercises, current_user)
+
+async def read_exercise_response(
+    db: AsyncSession,
+    exercise_id: str,
+    current_user: Optional[models.User] = None
+) -> schemas.Exercise:
+    """Read-through exercise lookup for detail views.
+    Counts and rating aggregates are part of the cached payload, so an anonymous cache hit
+    runs no query at all; a signed-in user adds one membership query and one rating lookup."""
+    exercise = schemas.Exercise.model_validate(await get_exercise_payload(db, exercise_id))
+    check_exercise_access(exercise, current_user)
+    await update_exercises_user_fields(db, [exercise], current_user)
+    return exercise
+
+def has_exercise_access(exercise: models.Exercise, current_user: Optional[models.User]) -> bool:
+    """Whether the user can see the exercise: it is public or their own"""
+    return exercise.is_public or (current_user is not None and current_user.id == exercise.creator_id)
+
 def check_exercise_access(exercise: models.Exercise, current_user: Optional[models.User]) -> None:
     """Check if user can access the exercise"""
-    if not exercise.is_public and (not current_user or current_user.id != exercise.creator_id):
+    if not has_exercise_access(exercise, current_user):
         raise forbidden_error(ErrorMessage.UNAUTHORIZED_ACCESS)
 
+async def read_exercises_batch_response(
+    db: AsyncSession,
+    exercise_ids: List[str],
+    current_user: Optional[models.User] = None
+) -> List[schemas.Exercise]:
+    """Read several exercises for detail views in request order.
+    Cache hits come from one MGET and misses from one IN query, which then fills the cache.
+    Ids that do not exist or that the user cannot access are left out."""
+    unique_ids = list(dict.fromkeys(exercise_ids))
+    payloads = await cache.async_get_cached_exercises(unique_ids)
+    missing = [exercise_id for exercise_id in unique_ids if exercise_id not in payloads]
+    if missing:
+        rows = await db.scalars(select(models.Exercise).where(models.Exercise.id.in_(missing)))
+        loaded = await serialize_exercises(db, rows.all())
+        await cache.async_cache_exercises(loaded)
+        payloads.update(loaded)
+
+    exercises = [schemas.Exercise.model_validate(payloads[exercise_id])
+                 for exercise_id in unique_ids if exercise_id in payloads]
+    exercises = [exercise for exercise in exercises if has_exercise_access(exercise, current_user)]
+    await update_exercises_user_fields(db, exercises, current_user)
+    return exercises
+
+def read_trending_exercises_response(
+    db: Session,
+    window: str,
+    limit: int,
+    current_user: Optional[models.User] = None
+) -> List[models.Exercise]:
+    """The top limit exercises of the trending window that the user can see, best first.
+    Ranked ids are read TRENDING_OVERFETCH times limit at a time until enough are visible
+    or the ranking runs out, so hidden exercises do not shorten the list."""
+    page_size = limit * TRENDING_OVERFETCH
+    offset, exercises = 0, []
+    while len(exercises) < limit:
+        scores = trending.get_trending(db, window, page_size, offset)
+        if scores:
+            visible = build_exercise_query(db, current_user).filter(models.Exercise.id.in_(list(scores))).all()
+            rank = {exercise_id: position for position, exercise_id in enumerate(scores)}
+            exercises.extend(sorted(visible, key=lambda exercise: rank[exercise.id]))
+        if len(scores) < page_size:
+            break
+        offset += page_size
+    return prepare_exercises_response(db, exercises[:limit], current_user)
+
 def check_exercise_modification(
     exercise: models.Exercise,
     current_user: models.User,
@@ -35,28 +197,52 @@ def handle_exercise_interaction(
     interaction_type: str,
     add: bool
 ) -> None:
-    """Handle adding/removing exercise interactions (favorites/saves)"""
-    if interaction_type == "favorites":
-        collection = current_user.favorite_exercises
-        count_type = "favorites"
+    """Add or remove a favorite/save and adjust the exercise's counter in one transaction.
+    INSERT ... ON CONFLICT DO NOTHING and DELETE ... RETURNING tell whether a row really changed,
+    so a repeated or concurrent request is a no-op rather than a unique violation."""
+    db = object_session(exercise)
+    table = cache_helpers.INTERACTION_MODELS[interaction_type].__table__
+    counter = models.Exercise.favorite_count if interaction_type == "favorites" else models.Exercise.save_count
+
+    if add:
+        statement = DIALECT_INSERTS[db.get_bind().dialect.name](table).values(
+            id=str(uuid.uuid4()), user_id=current_user.id, exercise_id=exercise.id
+        ).on_conflict_do_nothing(index_elements=[table.c.user_id, table.c.exercise_id])
     else:
-        collection = current_user.saved_exercises
-        count_type = "saves"
-
-    if add and exercise not in collection:
-        collection.append(exercise)
-        cache.increment_count(count_type, str(exercise.id))
-    elif not add and exercise in collection:
-        collection.remove(exercise)
-        cache.decrement_count(count_type, str(exercise.id))
-    
+        statement = delete(table).where(table.c.user_id == current_user.id, table.c.exercise_id == exercise.id)
+    changed = db.execute(statement.returning(table.c.created_at)).first()
+    if changed is None:
+        return
+
+    # Incremented in SQL so concurrent interactions cannot lose updates; updated_at is pinned
+    # because a favorite or save is not an edit of the exercise
+    db.execute(
+        update(models.Exercise)
+        .where(models.Exercise.id == exercise.id)
+        .values({counter: counter + (1 if add else -1), models.Exercise.updated_at: models.Exercise.updated_at})
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
     # Invalidate exercise cache
     cache.invalidate_exercise_cache(str(exercise.id))
+    trending.record_interaction(str(exercise.id), interaction_type, add, changed.created_at)
 
 def prepare_exercise_response(
     exercise: models.Exercise,
     current_user: Optional[models.User] = None
 ) -> models.Exercise:
-    """Prepare exercise for response by updating counts and interaction status"""
+    """Prepare exercise for response by updating ratings and interaction status"""
     cache_helpers.update_exercise_interaction_status(exercise, current_user)
-    return exercise 
\ No newline at end of file
+    update_exercises_rating_status(object_session(exercise), [exercise], current_user)
+    return exercise
+
+def prepare_exercises_response(
+    db: Session,
+    exercises: List[models.Exercise],
+    current_user: Optional[models.User] = None
+) -> List[models.Exercise]:
+    """Prepare a list of exercises for response, resolving ratings and interaction
+    status for the whole list in bulk instead of per row"""
+    cache_helpers.update_exercises_interaction_status(db, exercises, current_user)
+    update_exercises_rating_status(db, exercises, current_user)
+    return exercises
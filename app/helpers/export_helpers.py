@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import chain
+from typing import Iterator, Optional
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from .. import models
+from .exercise_helpers import build_exercise_query
+from .pagination import NDJSON_MEDIA_TYPE
+
+# Rows fetched from the server-side cursor at a time
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    models.Exercise.id,
+    models.Exercise.name,
+    models.Exercise.description,
+    models.Exercise.difficulty_level,
+    models.Exercise.is_public,
+    models.Exercise.creator_id,
+    models.Exercise.created_at,
+    models.Exercise.updated_at,
+    models.Exercise.favorite_count,
+    models.Exercise.save_count,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": NDJSON_MEDIA_TYPE,
+    "csv": "text/csv",
+}
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _in_chunks(lines: Iterator[str], size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Join lines into chunks of up to size lines so each write to the client is not a single row"""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+def _ndjson_lines(rows) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps({field: _plain(value) for field, value in zip(EXPORT_FIELDS, row)}) + "\n"
+
+def _csv_lines(rows) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for values in chain([EXPORT_FIELDS], ([_plain(value) for value in row] for row in rows)):
+        writer.writerow(values)
+        # Hand over the line the writer produced and reuse the buffer
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+def stream_exercise_export(
+    db: Session,
+    export_format: str,
+    current_user: Optional[models.User] = None
+) -> StreamingResponse:
+    """Stream every exercise visible to the user as NDJSON or CSV.
+    Plain column tuples come off a server-side cursor EXPORT_BATCH_SIZE at a time and are
+    written out directly, so memory stays flat however many rows there are."""
+    query = build_exercise_query(db, current_user).with_entities(*EXPORT_COLUMNS).order_by(models.Exercise.id)
+    rows = query.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+    lines = _csv_lines(rows) if export_format == "csv" else _ndjson_lines(rows)
+    return StreamingResponse(
+        _in_chunks(lines),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="exercises.{export_format}"'}
+    )
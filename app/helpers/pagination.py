@@ -0,0 +1,136 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple, Type
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import DateTime, String, func, select, tuple_, type_coerce
+from sqlalchemy.orm import Query
+from ..exceptions import validation_error, ErrorMessage
+
+# Every cursor-paginated endpoint returns the cursor for the following page in this header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Page size when a list endpoint gets a cursor but no limit
+DEFAULT_PAGE_SIZE = 100
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Rows fetched per keyset page while streaming
+STREAM_BATCH_SIZE = 500
+
+def encode_cursor(sort_key: str, values: Sequence[Any]) -> str:
+    """Encode the sort key and the last row's sort values into an opaque cursor"""
+    payload = json.dumps({"s": sort_key, "v": list(values)}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_key: str) -> List[Any]:
+    """Decode a cursor produced by encode_cursor for the given sort key.
+    Raises a validation error if the cursor is malformed or was issued for another sort order."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["v"]
+        if payload["s"] != sort_key or not isinstance(values, list):
+            raise ValueError
+        return values
+    except (ValueError, KeyError, TypeError):
+        raise validation_error(ErrorMessage.INVALID_CURSOR)
+
+# How SQLAlchemy stores a DateTime on SQLite; server-side CURRENT_TIMESTAMP leaves out the fraction
+SQLITE_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+def _keyset_filter(columns: Tuple, values: List[Any], dialect: str, descending: bool):
+    """The condition for rows after the cursor, from its decoded values"""
+    if len(values) != len(columns):
+        raise validation_error(ErrorMessage.INVALID_CURSOR)
+    bound = []
+    for column, value in zip(columns, values):
+        if isinstance(column.type, DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise validation_error(ErrorMessage.INVALID_CURSOR)
+            if dialect == "sqlite":
+                # SQLite compares the stored text, and a whole-second timestamp may be stored with
+                # or without ".000000"; take the cursor row's own text, found by its unique last column
+                stored = select(type_coerce(column, String)).where(columns[-1] == values[-1])
+                stored = stored.correlate(None).scalar_subquery()
+                value = func.coalesce(stored, type_coerce(value.strftime(SQLITE_TIMESTAMP_FORMAT), String))
+        bound.append(value)
+    return tuple_(*columns) < tuple_(*bound) if descending else tuple_(*columns) > tuple_(*bound)
+
+def paginate_keyset(
+    query: Query,
+    columns: Tuple,
+    sort_key: str,
+    cursor: Optional[str],
+    limit: int,
+    values_of: Optional[Callable[[Any], Sequence[Any]]] = None,
+    descending: bool = False
+) -> Tuple[list, Optional[str]]:
+    """Apply keyset pagination to a query ordered by the given columns.
+    The last column must be unique so that the order is total.
+    values_of reads the sort values from a row when the columns are not its attributes,
+    e.g. when ordering users by the join table's user_id.
+    descending reverses every column, so one ascending index still serves the order.
+    Returns the page of rows and the cursor for the next page (None on the last page)."""
+    if cursor:
+        dialect = query.session.get_bind().dialect.name
+        query = query.filter(_keyset_filter(columns, decode_cursor(cursor, sort_key), dialect, descending))
+
+    # Fetch one extra row to find out whether there is a next page
+    order = [column.desc() for column in columns] if descending else columns
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    values = values_of(last) if values_of else [getattr(last, column.key) for column in columns]
+    next_cursor = encode_cursor(sort_key, values)
+    return rows, next_cursor
+
+def paginate_keyset_response(
+    response: Response,
+    query: Query,
+    columns: Tuple,
+    sort_key: str,
+    cursor: Optional[str],
+    limit: int = DEFAULT_PAGE_SIZE,
+    values_of: Optional[Callable[[Any], Sequence[Any]]] = None
+) -> list:
+    """paginate_keyset for endpoints returning a plain list: the next cursor goes in a header.
+    Always a bounded page; stream_keyset_ndjson serves callers that want every row."""
+    rows, next_cursor = paginate_keyset(query, columns, sort_key, cursor, limit, values_of)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+def stream_keyset_ndjson(
+    query: Query,
+    columns: Tuple,
+    sort_key: str,
+    cursor: Optional[str],
+    schema: Type[BaseModel],
+    prepare: Optional[Callable[[list], Any]] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+    values_of: Optional[Callable[[Any], Sequence[Any]]] = None
+) -> StreamingResponse:
+    """Stream every row from the cursor onwards as NDJSON, one keyset page at a time.
+    Memory is bounded by batch_size and the first line is sent after the first page,
+    however many rows match. prepare is applied to each page before it is serialized."""
+    if cursor:
+        # Reject a bad cursor with a proper error before the stream starts
+        decode_cursor(cursor, sort_key)
+
+    def lines() -> Iterator[str]:
+        next_cursor = cursor
+        while True:
+            rows, next_cursor = paginate_keyset(query, columns, sort_key, next_cursor, batch_size, values_of)
+            if prepare:
+                prepare(rows)
+            for row in rows:
+                yield schema.model_validate(row).model_dump_json() + "\n"
+            if next_cursor is None:
+                return
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,118 @@
+import uuid
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .. import models
+from ..rating_stats import RATING_VALUES
+
+DIALECT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+def upsert_rating(db: Session, exercise_id: str, user_id: str, value: int) -> Tuple[Optional[dict], bool]:
+    """Insert or update the user's rating of an exercise in one statement.
+    Returns the stored rating, or None if the exercise does not exist, and whether it was a new rating."""
+    insert = DIALECT_INSERTS[db.get_bind().dialect.name]
+    ratings = models.Rating.__table__
+    now = func.now()
+    rating_id = str(uuid.uuid4())
+    # INSERT ... SELECT FROM exercises inserts nothing for a missing exercise
+    source = select(
+        literal(rating_id),
+        literal(user_id),
+        models.Exercise.id,
+        literal(value),
+        now,
+        now
+    ).where(models.Exercise.id == exercise_id)
+    statement = insert(ratings).from_select(
+        ["id", "user_id", "exercise_id", "value", "created_at", "updated_at"],
+        source
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[ratings.c.user_id, ratings.c.exercise_id],
+        set_={"value": statement.excluded.value, "updated_at": now}
+    ).returning(*ratings.c)
+    row = db.execute(statement).mappings().first()
+    db.commit()
+    if row is None:
+        return None, False
+    # An update keeps the existing row's id, so only a new row comes back with ours
+    return dict(row), row["id"] == rating_id
+
+def get_rating_stats(
+    db: Session,
+    exercise_ids: List[str],
+    user: Optional[models.User] = None
+) -> Dict[str, Tuple[int, int, Optional[int]]]:
+    """Get (rating_sum, rating_count, the user's rating) for each exercise in one primary-key lookup.
+    Exercises without ratings are absent from the result."""
+    if not exercise_ids:
+        return {}
+    stats = models.ExerciseRatingStats
+    if user:
+        # A user's rating implies a stats row, so the outer join finds every one of them
+        query = db.query(stats.exercise_id, stats.rating_sum, stats.rating_count, models.Rating.value).outerjoin(
+            models.Rating,
+            and_(models.Rating.exercise_id == stats.exercise_id, models.Rating.user_id == user.id)
+        )
+    else:
+        query = db.query(stats.exercise_id, stats.rating_sum, stats.rating_count, literal(None))
+    rows = query.filter(stats.exercise_id.in_(exercise_ids)).all()
+    return {exercise_id: (rating_sum, rating_count, value) for exercise_id, rating_sum, rating_count, value in rows}
+
+def update_exercises_rating_status(
+    db: Session,
+    exercises: List,
+    current_user: Optional[models.User] = None
+) -> None:
+    """Set avg_rating, rating_count and user_rating on exercises (ORM objects or schemas)"""
+    ratings = get_rating_stats(db, [str(exercise.id) for exercise in exercises], current_user)
+    for exercise in exercises:
+        rating_sum, rating_count, user_rating = ratings.get(str(exercise.id), (0, 0, None))
+        exercise.avg_rating = rating_sum / rating_count if rating_count else None
+        exercise.rating_count = rating_count
+        exercise.user_rating = user_rating
+
+async def update_exercises_rating_aggregates(db: AsyncSession, exercises: List) -> None:
+    """Set avg_rating and rating_count on exercises from one primary-key lookup"""
+    if not exercises:
+        return
+    stats = models.ExerciseRatingStats
+    rows = await db.execute(
+        select(stats.exercise_id, stats.rating_sum, stats.rating_count)
+        .where(stats.exercise_id.in_([str(exercise.id) for exercise in exercises]))
+    )
+    aggregates = {exercise_id: (rating_sum, rating_count) for exercise_id, rating_sum, rating_count in rows}
+    for exercise in exercises:
+        rating_sum, rating_count = aggregates.get(str(exercise.id), (0, 0))
+        exercise.avg_rating = rating_sum / rating_count if rating_count else None
+        exercise.rating_count = rating_count
+
+async def update_exercises_user_rating(db: AsyncSession, exercises: List, current_user: models.User) -> None:
+    """Set user_rating on exercises (ORM objects or schemas) without touching the aggregates"""
+    rows = await db.execute(
+        select(models.Rating.exercise_id, models.Rating.value).where(
+            models.Rating.user_id == current_user.id,
+            models.Rating.exercise_id.in_([str(exercise.id) for exercise in exercises])
+        )
+    )
+    ratings = dict(rows.all())
+    for exercise in exercises:
+        exercise.user_rating = ratings.get(str(exercise.id))
+
+async def get_rating_summary(db: AsyncSession, exercise_id: str) -> dict:
+    """Get an exercise's rating average, count and 1-5 histogram"""
+    # Triggers write the row behind the ORM's back, so never trust the identity map
+    stats = await db.get(models.ExerciseRatingStats, exercise_id, populate_existing=True)
+    histogram = {value: getattr(stats, f"count_{value}") if stats else 0 for value in RATING_VALUES}
+    rating_count = stats.rating_count if stats else 0
+    return {
+        "exercise_id": exercise_id,
+        "avg_rating": stats.rating_sum / rating_count if rating_count else None,
+        "rating_count": rating_count,
+        "histogram": histogram
+    }
@@ -0,0 +1,259 @@
+"""Bulk-load exercises and interactions from NDJSON or CSV dumps.
+
+    python -m app.importer exercises exercises.ndjson
+    python -m app.importer favorites - --format csv --batch-size 5000 --workers 4 < favorites.csv
+
+Records are parsed one at a time and written in batches: COPY on PostgreSQL,
+executemany INSERTs elsewhere. Each batch is its own transaction. Every column
+of the table is written: a key missing from a record gets the model's default
+(SQL defaults such as now() become the import's start time) and a key that is
+not a column is an error. GET /exercises/export output loads as is.
+
+SQLite takes one writer at a time, so --workers is ignored there. While ratings
+load, the per-row aggregate triggers are off. However the load ends, even on a
+failed batch or with --skip-rebuild, they are turned back on and the rating
+aggregates recomputed in one transaction. On PostgreSQL DISABLE TRIGGER applies
+to every session, so ratings the application writes during the import do not
+update the aggregates either until that closing rebuild; ENABLE TRIGGER holds a
+lock that blocks rating writes until the rebuild commits, so none are missed.
+Afterwards the favorite/save counts are recomputed from the imported rows and
+cached exercises are dropped.
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional
+from sqlalchemy import Boolean, Column, DateTime, Float, Integer, Table
+from sqlalchemy.engine import Connection, Engine
+from . import cache, models
+from .database import engine as default_engine
+from .rating_stats import disable_rating_triggers, enable_rating_triggers, rebuild_rating_stats
+
+IMPORT_TABLES = {
+    "exercises": models.Exercise.__table__,
+    "favorites": models.Favorite.__table__,
+    "saves": models.Save.__table__,
+    "ratings": models.Rating.__table__,
+}
+IMPORT_FORMATS = ("ndjson", "csv")
+DEFAULT_BATCH_SIZE = 1000
+
+def read_records(stream: IO[str], input_format: str) -> Iterator[Dict[str, Any]]:
+    """Parse records one line at a time"""
+    if input_format == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+def _coerce(column: Column, value: Any) -> Any:
+    """Convert CSV text (and JSON timestamps) to the column's Python type"""
+    if not isinstance(value, str):
+        return value
+    column_type = column.type
+    if value == "" and isinstance(column_type, (Boolean, DateTime, Float, Integer)):
+        return None
+    if isinstance(column_type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column_type, Boolean):
+        return value.strip().lower() in ("1", "true", "t", "yes")
+    if isinstance(column_type, Integer):
+        return int(value)
+    if isinstance(column_type, Float):
+        return float(value)
+    return value
+
+def _column_default(column: Column, now: datetime) -> Callable[[], Any]:
+    """What a record without the column gets: the model's Python default, or now for SQL defaults,
+    which COPY and executemany would otherwise override with NULL"""
+    default = column.default
+    if default is not None and default.is_scalar:
+        return lambda: default.arg
+    if default is not None and default.is_callable:
+        return lambda: default.arg(None)
+    if default is not None or column.server_default is not None:
+        return lambda: now
+    return lambda: None
+
+def _insert_batch(connection: Connection, table: Table, columns: List[Column], rows: List[dict]) -> None:
+    connection.execute(table.insert(), rows)
+
+def _copy_batch(connection: Connection, table: Table, columns: List[Column], rows: List[dict]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column.name] for column in columns])
+    buffer.seek(0)
+    names = ", ".join(column.name for column in columns)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({names}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+class ImportProgress:
+    """Row counts shared by the workers, reported every interval seconds"""
+
+    def __init__(self, table: str, interval: float, out: IO[str]):
+        self.table = table
+        self.interval = interval
+        self.out = out
+        self.rows = 0
+        self.batches = 0
+        self.started = time.monotonic()
+        self._reported = self.started
+        self._lock = threading.Lock()
+
+    def add(self, rows: int) -> None:
+        with self._lock:
+            self.rows += rows
+            self.batches += 1
+            now = time.monotonic()
+            if self.interval and now - self._reported >= self.interval:
+                self._reported = now
+                self.report()
+
+    def report(self, final: bool = False) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        label = "imported" if final else "importing"
+        print(f"{self.table}: {label} {self.rows} rows in {self.batches} batches, "
+              f"{elapsed:.1f}s, {self.rows / elapsed:.0f} rows/s", file=self.out)
+
+    def stats(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        return {"table": self.table, "rows": self.rows, "batches": self.batches, "seconds": elapsed}
+
+def import_records(
+    engine: Engine,
+    table_name: str,
+    records: Iterator[Dict[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 1,
+    progress_interval: float = 5.0,
+    out: IO[str] = sys.stderr
+) -> dict:
+    """Write records to the table in batches, with up to workers batches in flight (one on SQLite).
+    Returns the row and batch counts and the elapsed time. Raises ValueError on a key that is not a column."""
+    table = IMPORT_TABLES[table_name]
+    columns = list(table.columns)
+    defaults = {column.name: _column_default(column, datetime.utcnow()) for column in columns}
+    if engine.dialect.name == "sqlite":
+        # Parallel batches would only queue up on SQLite's database lock
+        workers = 1
+    write_batch = _copy_batch if engine.dialect.name == "postgresql" else _insert_batch
+    progress = ImportProgress(table_name, progress_interval, out)
+
+    def to_row(number: int, record: Dict[str, Any]) -> dict:
+        unknown = record.keys() - defaults.keys()
+        if unknown:
+            raise ValueError(f"record {number}: {table_name} has no column {', '.join(sorted(map(str, unknown)))}")
+        row = {column.name: _coerce(column, record[column.name]) if column.name in record
+               else defaults[column.name]() for column in columns}
+        if not row["id"]:
+            row["id"] = defaults["id"]()
+        return row
+
+    def write(rows: List[dict]) -> None:
+        with engine.begin() as connection:
+            write_batch(connection, table, columns, rows)
+        progress.add(len(rows))
+
+    # Bound the batches waiting for a worker so memory does not grow with the input
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    futures = []
+
+    def submit(rows: List[dict]) -> None:
+        if workers == 1:
+            write(rows)
+            return
+        in_flight.acquire()
+        future = pool.submit(write, rows)
+        future.add_done_callback(lambda _: in_flight.release())
+        futures.append(future)
+
+    if table_name == "ratings":
+        # The aggregates are recomputed once at the end instead of a trigger per row
+        with engine.begin() as connection:
+            disable_rating_triggers(connection)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="importer") if workers > 1 else None
+    try:
+        batch = []
+        for number, record in enumerate(records, 1):
+            batch.append(to_row(number, record))
+            if len(batch) >= batch_size:
+                submit(batch)
+                batch = []
+            # Surface a failed batch without waiting for the end of the input
+            if futures and futures[0].done():
+                futures.pop(0).result()
+        if batch:
+            submit(batch)
+        for future in futures:
+            future.result()
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+        if table_name == "ratings":
+            # Also on failure: the batches already committed must not leave the aggregates behind
+            with engine.begin() as connection:
+                enable_rating_triggers(connection)
+                rebuild_rating_stats(connection)
+            cache.clear_prefix(cache.EXERCISE_PREFIX)
+    progress.report(final=True)
+    return progress.stats()
+
+def rebuild_counters(engine: Engine, rating_stats: bool = True) -> int:
+    """Recompute the denormalized counts from the imported rows and drop cached exercises.
+    rating_stats=False skips the rating aggregates, which a ratings import has already rebuilt.
+    Returns the number of cache keys deleted."""
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "UPDATE exercises SET "
+            "favorite_count = (SELECT COUNT(*) FROM favorites WHERE favorites.exercise_id = exercises.id), "
+            "save_count = (SELECT COUNT(*) FROM saves WHERE saves.exercise_id = exercises.id)"
+        )
+        if rating_stats:
+            rebuild_rating_stats(connection)
+    return cache.clear_prefix(cache.EXERCISE_PREFIX)
+
+def _detect_format(path: str, input_format: Optional[str]) -> str:
+    if input_format:
+        return input_format
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+def main(argv: Optional[List[str]] = None, engine: Engine = default_engine) -> None:
+    parser = argparse.ArgumentParser(description="Bulk-import exercises and interactions")
+    parser.add_argument("table", choices=list(IMPORT_TABLES))
+    parser.add_argument("path", nargs="?", default="-", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="defaults to the file extension, else ndjson")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="batches written in parallel (ignored on SQLite)")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="seconds between reports")
+    parser.add_argument("--skip-rebuild", action="store_true",
+                        help="do not recompute counts afterwards; run rebuild_counters once the last table is loaded")
+    args = parser.parse_args(argv)
+
+    input_format = _detect_format(args.path, args.format)
+    stream = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+    try:
+        import_records(engine, args.table, read_records(stream, input_format),
+                       args.batch_size, max(args.workers, 1), args.progress_interval)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    if not args.skip_rebuild:
+        started = time.monotonic()
+        cleared = rebuild_counters(engine, rating_stats=args.table != "ratings")
+        print(f"rebuilt counts in {time.monotonic() - started:.1f}s, cleared {cleared} cached exercises",
+              file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
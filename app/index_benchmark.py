@@ -0,0 +1,118 @@
+"""Measure join and lookup cost on the interaction tables with and without their indexes.
+
+    python -m app.index_benchmark --sizes 1000 10000 100000
+
+Each size is the number of favorites, saves and ratings rows in a scratch
+SQLite database. Queries are timed with the indexes dropped, then again with
+them created, and the plan SQLite chose is shown for the indexed run.
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+from .database import Base
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+
+BENCHMARK_INDEXES = {
+    "uq_favorite_user_exercise": "CREATE UNIQUE INDEX uq_favorite_user_exercise ON favorites (user_id, exercise_id)",
+    "idx_favorite_exercise_user": "CREATE INDEX idx_favorite_exercise_user ON favorites (exercise_id, user_id)",
+    "uq_save_user_exercise": "CREATE UNIQUE INDEX uq_save_user_exercise ON saves (user_id, exercise_id)",
+    "idx_save_exercise_user": "CREATE INDEX idx_save_exercise_user ON saves (exercise_id, user_id)",
+    "idx_rating_exercise": "CREATE INDEX idx_rating_exercise ON ratings (exercise_id, id)",
+    "idx_exercise_creator": "CREATE INDEX idx_exercise_creator ON exercises (creator_id)",
+}
+
+QUERIES = {
+    "user favorites": (
+        "SELECT exercises.id FROM exercises JOIN favorites ON favorites.exercise_id = exercises.id "
+        "WHERE favorites.user_id = :user_id"
+    ),
+    "exercise savers page": (
+        "SELECT users.id FROM users JOIN saves ON saves.user_id = users.id "
+        "WHERE saves.exercise_id = :exercise_id ORDER BY saves.user_id LIMIT 100"
+    ),
+    "exercise ratings page": (
+        "SELECT id, value FROM ratings WHERE exercise_id = :exercise_id ORDER BY id LIMIT 100"
+    ),
+    "creator exercises": "SELECT id FROM exercises WHERE creator_id = :user_id",
+}
+
+def _populate(connection: Connection, size: int, rng: random.Random) -> Dict[str, str]:
+    user_ids = [str(uuid.uuid4()) for _ in range(max(size // 50, 2))]
+    exercise_ids = [str(uuid.uuid4()) for _ in range(max(size // 10, 2))]
+    connection.execute(models.User.__table__.insert(), [
+        {"id": user_id, "username": user_id, "hashed_password": "-"} for user_id in user_ids
+    ])
+    connection.execute(models.Exercise.__table__.insert(), [
+        {"id": exercise_id, "name": exercise_id, "description": "", "difficulty_level": rng.randint(1, 5),
+         "is_public": True, "creator_id": rng.choice(user_ids)}
+        for exercise_id in exercise_ids
+    ])
+    for model in (models.Favorite, models.Save, models.Rating):
+        pairs = set()
+        while len(pairs) < min(size, len(user_ids) * len(exercise_ids)):
+            pairs.add((rng.choice(user_ids), rng.choice(exercise_ids)))
+        rows = [{"id": str(uuid.uuid4()), "user_id": user_id, "exercise_id": exercise_id}
+                for user_id, exercise_id in pairs]
+        if model is models.Rating:
+            for row in rows:
+                row["value"] = rng.randint(1, 5)
+        connection.execute(model.__table__.insert(), rows)
+    return {"user_id": rng.choice(user_ids), "exercise_id": rng.choice(exercise_ids)}
+
+def _time_query(connection: Connection, sql: str, params: dict, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        connection.execute(text(sql), params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def _plan(connection: Connection, sql: str, params: dict) -> str:
+    rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).fetchall()
+    return "; ".join(row[-1] for row in rows)
+
+def benchmark(size: int, repeats: int = 5, seed: int = 0) -> List[dict]:
+    """Time each query at the given table size without and with the indexes"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    results = []
+    with engine.begin() as connection:
+        for name in BENCHMARK_INDEXES:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+        params = _populate(connection, size, random.Random(seed))
+        connection.exec_driver_sql("ANALYZE")
+        before = {name: _time_query(connection, sql, params, repeats) for name, sql in QUERIES.items()}
+
+        for statement in BENCHMARK_INDEXES.values():
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql("ANALYZE")
+        for name, sql in QUERIES.items():
+            results.append({
+                "size": size,
+                "query": name,
+                "before_ms": before[name],
+                "after_ms": _time_query(connection, sql, params, repeats),
+                "plan": _plan(connection, sql, params)
+            })
+    engine.dispose()
+    return results
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark interaction table indexes")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>8} {'query':<24} {'no index ms':>12} {'indexed ms':>11}  plan")
+    for size in args.sizes:
+        for result in benchmark(size, args.repeats):
+            print(f"{result['size']:>8} {result['query']:<24} {result['before_ms']:>12.3f} "
+                  f"{result['after_ms']:>11.3f}  {result['plan']}")
+
+if __name__ == "__main__":
+    main()
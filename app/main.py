@@ -1,12 +1,27 @@
+import os
+import anyio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base, create_tables
+from .database import async_engine
 from .routers import exercises, users, auth, health
-from . import schemas, cache
+from . import schemas, cache, migrations
+from .helpers.pagination import NEXT_CURSOR_HEADER
 from datetime import datetime
+from contextlib import asynccontextmanager
 
-# Create all tables on startup
-create_tables()
+# Size of the threadpool that runs sync (def) route handlers
+THREADPOOL_SIZE = os.getenv("THREADPOOL_SIZE")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if THREADPOOL_SIZE:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = int(THREADPOOL_SIZE)
+    # Migrate, verify or skip the schema depending on SCHEMA_STARTUP_MODE
+    await anyio.to_thread.run_sync(migrations.init_schema)
+    # Keeps the optional in-process cache tier coherent across workers
+    cache.start_invalidation_listener()
+    yield
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Exercise Management API",
@@ -22,7 +37,8 @@ app = FastAPI(
     """,
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware configuration
@@ -32,6 +48,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets cross-origin clients read the cursor of paginated list responses
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers
@@ -0,0 +1,106 @@
+import fcntl
+import logging
+import os
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from .database import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What the app does with the schema at startup:
+#   migrate - upgrade to the latest revision, one process at a time
+#   verify  - refuse to start unless the schema is at the latest revision
+#   none    - leave the schema alone (migrations run as a separate deploy step)
+SCHEMA_STARTUP_MODES = ("migrate", "verify", "none")
+SCHEMA_STARTUP_MODE = os.getenv("SCHEMA_STARTUP_MODE", "migrate")
+
+# Revision matching the schema that create_all produced before migrations existed
+BASELINE_REVISION = "0001"
+
+# Key for the PostgreSQL advisory lock that serializes migrations across workers
+MIGRATION_LOCK_KEY = 814_027_113
+
+def get_alembic_config(connection: Optional[Connection] = None) -> Config:
+    """Build the Alembic config, optionally bound to an existing connection"""
+    config = Config(os.path.join(ROOT_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT_DIR, "alembic"))
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+def get_head_revision() -> str:
+    return ScriptDirectory.from_config(get_alembic_config()).get_current_head()
+
+def get_current_revision(connection: Connection) -> Optional[str]:
+    return MigrationContext.configure(connection).get_current_revision()
+
+@contextmanager
+def migration_lock(engine: Engine) -> Iterator[None]:
+    """Hold an exclusive lock so that only one process migrates at a time"""
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as connection:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            try:
+                yield
+            finally:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    elif engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        with open(f"{engine.url.database}.migrate.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield
+
+def migrate(engine: Engine = default_engine) -> None:
+    """Upgrade the database to the latest revision.
+    Costs one version query when the schema is already current."""
+    head = get_head_revision()
+    with engine.connect() as connection:
+        if get_current_revision(connection) == head:
+            return
+
+    with migration_lock(engine):
+        with engine.begin() as connection:
+            # Another process may have migrated while we waited for the lock
+            current = get_current_revision(connection)
+            if current == head:
+                return
+            config = get_alembic_config(connection)
+            if current is None and inspect(connection).has_table("users"):
+                logger.info("Unversioned schema found, stamping baseline revision %s", BASELINE_REVISION)
+                command.stamp(config, BASELINE_REVISION)
+            logger.info("Upgrading schema from %s to %s", current, head)
+            command.upgrade(config, "head")
+
+def verify(engine: Engine = default_engine) -> None:
+    """Raise if the database is not at the latest revision"""
+    head = get_head_revision()
+    with engine.connect() as connection:
+        current = get_current_revision(connection)
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}. "
+            "Run 'alembic upgrade head' or start with SCHEMA_STARTUP_MODE=migrate."
+        )
+
+def init_schema(engine: Engine = default_engine, mode: str = None) -> None:
+    """Prepare the schema at startup according to SCHEMA_STARTUP_MODE"""
+    mode = mode or SCHEMA_STARTUP_MODE
+    if mode not in SCHEMA_STARTUP_MODES:
+        raise ValueError(f"SCHEMA_STARTUP_MODE must be one of {', '.join(SCHEMA_STARTUP_MODES)}, got {mode!r}")
+    if mode == "migrate":
+        migrate(engine)
+    elif mode == "verify":
+        verify(engine)
@@ -3,6 +3,8 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from .database import Base
+from .search import register_search_ddl
+from .rating_stats import register_rating_stats_ddl
 
 class User(Base):
     __tablename__ = "users"
@@ -30,6 +32,11 @@ class Exercise(Base):
     creator_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Updated in the same transaction as the favorites/saves rows (see handle_exercise_interaction)
+    favorite_count = Column(Integer, nullable=False, default=0, server_default="0")
+    save_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Copied from exercise_rating_stats by the rating triggers so the rating sort can use an index
+    rating_avg = Column(Float, nullable=False, default=0, server_default="0")
 
     # Relationships
     creator = relationship("User", back_populates="exercises", foreign_keys=[creator_id], passive_deletes=True)
@@ -40,8 +47,18 @@ class Exercise(Base):
     # Multi-column index for efficient filtering and sorting
     __table_args__ = (
         Index('idx_exercise_search', 'is_public', 'difficulty_level', 'name'),
+        Index('idx_exercise_creator', 'creator_id'),
+        # Matches the (difficulty_level, name, id) keyset order used by cursor pagination
+        Index('idx_exercise_difficulty_keyset', 'difficulty_level', 'name', 'id'),
+        # One index per sort= key, in the same column order (scanned backwards for descending sorts)
+        Index('idx_exercise_created_keyset', 'created_at', 'id'),
+        Index('idx_exercise_favorites_keyset', 'favorite_count', 'id'),
+        Index('idx_exercise_rating_keyset', 'rating_avg', 'id'),
     )
 
+# Full-text search index (FTS5 on SQLite, tsvector/pg_trgm GIN on PostgreSQL)
+register_search_ddl(Exercise.__table__)
+
 class Rating(Base):
     __tablename__ = "ratings"
 
@@ -56,6 +73,29 @@ class Rating(Base):
     user = relationship("User", back_populates="ratings", foreign_keys=[user_id])
     exercise = relationship("Exercise", back_populates="ratings", foreign_keys=[exercise_id])
 
+    # One rating per user and exercise; also the conflict target of the rating upsert.
+    # The reverse index serves an exercise's ratings in keyset (id) order.
+    __table_args__ = (
+        Index('uq_rating_user_exercise', 'user_id', 'exercise_id', unique=True),
+        Index('idx_rating_exercise', 'exercise_id', 'id'),
+    )
+
+# Triggers maintaining exercise_rating_stats
+register_rating_stats_ddl(Rating.__table__)
+
+class ExerciseRatingStats(Base):
+    """Rating aggregates per exercise, maintained by triggers on ratings"""
+    __tablename__ = "exercise_rating_stats"
+
+    exercise_id = Column(String(36), ForeignKey("exercises.id", ondelete="CASCADE"), primary_key=True)
+    rating_sum = Column(Integer, nullable=False, server_default="0")
+    rating_count = Column(Integer, nullable=False, server_default="0")
+    count_1 = Column(Integer, nullable=False, server_default="0")
+    count_2 = Column(Integer, nullable=False, server_default="0")
+    count_3 = Column(Integer, nullable=False, server_default="0")
+    count_4 = Column(Integer, nullable=False, server_default="0")
+    count_5 = Column(Integer, nullable=False, server_default="0")
+
 class Favorite(Base):
     __tablename__ = "favorites"
 
@@ -68,6 +108,12 @@ class Favorite(Base):
     user = relationship("User", overlaps="favorite_exercises,favorited_by")
     exercise = relationship("Exercise", overlaps="favorite_exercises,favorited_by")
 
+    # One row per pair, looked up from either side (user's list, exercise's users)
+    __table_args__ = (
+        Index('uq_favorite_user_exercise', 'user_id', 'exercise_id', unique=True),
+        Index('idx_favorite_exercise_user', 'exercise_id', 'user_id'),
+    )
+
 class Save(Base):
     __tablename__ = "saves"
 
@@ -78,4 +124,10 @@ class Save(Base):
 
     # Relationships
     user = relationship("User", overlaps="saved_exercises,saved_by")
-    exercise = relationship("Exercise", overlaps="saved_exercises,saved_by") 
\ No newline at end of file
+    exercise = relationship("Exercise", overlaps="saved_exercises,saved_by")
+
+    # One row per pair, looked up from either side (user's list, exercise's users)
+    __table_args__ = (
+        Index('uq_save_user_exercise', 'user_id', 'exercise_id', unique=True),
+        Index('idx_save_exercise_user', 'exercise_id', 'user_id'),
+    ) 
\ No newline at end of file
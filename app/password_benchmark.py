@@ -0,0 +1,52 @@
+"""Measure password hash/verify latency for candidate settings.
+
+    python -m app.password_benchmark --schemes bcrypt --rounds 10 11 12 13
+
+Pick the highest cost whose verify latency fits the login latency budget;
+BCRYPT_ROUNDS and PASSWORD_SCHEMES then apply it, and existing hashes are
+upgraded as users log in.
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, List, Optional
+from .auth import BCRYPT_ROUNDS, PASSWORD_SCHEMES, build_crypt_context
+
+def _time_calls(fn: Callable[[], object], iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def benchmark(scheme: str, rounds: Optional[int], iterations: int, password: str = "benchmark-password") -> dict:
+    """Time hashing and verification for one scheme and cost, in milliseconds"""
+    context = build_crypt_context([scheme], rounds)
+    hashed = context.hash(password)
+    hash_timings = _time_calls(lambda: context.hash(password), iterations)
+    verify_timings = _time_calls(lambda: context.verify(password, hashed), iterations)
+    return {
+        "scheme": scheme,
+        "rounds": rounds if scheme == "bcrypt" else None,
+        "hash_ms": statistics.median(hash_timings),
+        "verify_ms": statistics.median(verify_timings),
+        "verify_max_ms": max(verify_timings)
+    }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark password hashing settings")
+    parser.add_argument("--schemes", nargs="+", default=PASSWORD_SCHEMES[:1])
+    parser.add_argument("--rounds", nargs="+", type=int, default=[BCRYPT_ROUNDS], help="bcrypt costs to try")
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'scheme':<10} {'rounds':>6} {'hash ms':>9} {'verify ms':>10} {'verify max':>11}")
+    for scheme in args.schemes:
+        for rounds in (args.rounds if scheme == "bcrypt" else [None]):
+            result = benchmark(scheme, rounds, args.iterations)
+            print(f"{result['scheme']:<10} {result['rounds'] or '-':>6} {result['hash_ms']:>9.1f} "
+                  f"{result['verify_ms']:>10.1f} {result['verify_max_ms']:>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Per-exercise rating aggregates.
+
+exercise_rating_stats holds the sum, count and 1-5 histogram of each exercise's
+ratings. Triggers on ratings keep it current on every insert, update and
+delete, including cascades, so reads never scan ratings.
+"""
+from sqlalchemy import DDL, Table, event
+from sqlalchemy.engine import Connection
+
+STATS_TABLE = "exercise_rating_stats"
+RATING_VALUES = range(1, 6)
+
+def _bucket(row: str, value: int) -> str:
+    return f"CASE WHEN {row}.value = {value} THEN 1 ELSE 0 END"
+
+def _add_rating(row: str) -> str:
+    """Upsert that adds the rating in row (new/NEW) to its exercise's aggregates"""
+    buckets = ", ".join(f"count_{value}" for value in RATING_VALUES)
+    bucket_values = ", ".join(_bucket(row, value) for value in RATING_VALUES)
+    bucket_updates = ", ".join(f"count_{value} = {STATS_TABLE}.count_{value} + excluded.count_{value}"
+                               for value in RATING_VALUES)
+    return (
+        f"INSERT INTO {STATS_TABLE} (exercise_id, rating_sum, rating_count, {buckets}) "
+        f"VALUES ({row}.exercise_id, {row}.value, 1, {bucket_values}) "
+        f"ON CONFLICT (exercise_id) DO UPDATE SET "
+        f"rating_sum = {STATS_TABLE}.rating_sum + excluded.rating_sum, "
+        f"rating_count = {STATS_TABLE}.rating_count + 1, {bucket_updates}"
+    )
+
+def _remove_rating(row: str) -> str:
+    """Update that removes the rating in row (old/OLD) from its exercise's aggregates"""
+    bucket_updates = ", ".join(f"count_{value} = count_{value} - {_bucket(row, value)}" for value in RATING_VALUES)
+    return (
+        f"UPDATE {STATS_TABLE} SET rating_sum = rating_sum - {row}.value, "
+        f"rating_count = rating_count - 1, {bucket_updates} "
+        f"WHERE exercise_id = {row}.exercise_id"
+    )
+
+def _refresh_average(row: str) -> str:
+    """Update that copies the average of the exercise rated in row onto exercises.rating_avg"""
+    return (
+        f"UPDATE exercises SET rating_avg = COALESCE((SELECT CAST(rating_sum AS FLOAT) / rating_count "
+        f"FROM {STATS_TABLE} WHERE exercise_id = {row}.exercise_id AND rating_count > 0), 0) "
+        f"WHERE id = {row}.exercise_id"
+    )
+
+SQLITE_CREATE = [
+    f"""CREATE TRIGGER IF NOT EXISTS ratings_stats_ai AFTER INSERT ON ratings BEGIN
+        {_add_rating("new")};
+        {_refresh_average("new")};
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ratings_stats_au AFTER UPDATE OF value, exercise_id ON ratings BEGIN
+        {_remove_rating("old")};
+        {_add_rating("new")};
+        {_refresh_average("old")};
+        {_refresh_average("new")};
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS ratings_stats_ad AFTER DELETE ON ratings BEGIN
+        {_remove_rating("old")};
+        {_refresh_average("old")};
+    END""",
+    # SQLite does not enforce the foreign key cascade unless asked to
+    f"""CREATE TRIGGER IF NOT EXISTS exercises_rating_stats_ad AFTER DELETE ON exercises BEGIN
+        DELETE FROM {STATS_TABLE} WHERE exercise_id = old.id;
+    END""",
+]
+
+SQLITE_RATING_TRIGGERS = ("ratings_stats_ai", "ratings_stats_au", "ratings_stats_ad")
+
+PG_CREATE = [
+    f"""CREATE OR REPLACE FUNCTION ratings_stats_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            {_remove_rating("OLD")};
+            {_refresh_average("OLD")};
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            {_add_rating("NEW")};
+            {_refresh_average("NEW")};
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER ratings_stats AFTER INSERT OR DELETE OR UPDATE OF value, exercise_id ON ratings
+        FOR EACH ROW EXECUTE FUNCTION ratings_stats_apply()""",
+]
+PG_DROP = ["DROP FUNCTION IF EXISTS ratings_stats_apply()"]
+
+def register_rating_stats_ddl(ratings: Table) -> None:
+    """Create the aggregate triggers together with the ratings table"""
+    for statement in SQLITE_CREATE:
+        event.listen(ratings, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    for statement in PG_CREATE:
+        event.listen(ratings, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in PG_DROP:
+        event.listen(ratings, "after_drop", DDL(statement).execute_if(dialect="postgresql"))
+
+def disable_rating_triggers(connection: Connection) -> None:
+    """Stop maintaining the aggregates row by row, for a bulk load followed by rebuild_rating_stats"""
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("ALTER TABLE ratings DISABLE TRIGGER ratings_stats")
+        return
+    # SQLite triggers cannot be disabled, only dropped and created again
+    for name in SQLITE_RATING_TRIGGERS:
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+def enable_rating_triggers(connection: Connection) -> None:
+    """Undo disable_rating_triggers"""
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("ALTER TABLE ratings ENABLE TRIGGER ratings_stats")
+        return
+    for statement in SQLITE_CREATE:
+        connection.exec_driver_sql(statement)
+
+def rebuild_rating_stats(connection: Connection) -> None:
+    """Recompute every exercise's aggregates from ratings"""
+    buckets = ", ".join(f"count_{value}" for value in RATING_VALUES)
+    bucket_sums = ", ".join(f"SUM({_bucket('ratings', value)})" for value in RATING_VALUES)
+    connection.exec_driver_sql(f"DELETE FROM {STATS_TABLE}")
+    connection.exec_driver_sql(
+        f"INSERT INTO {STATS_TABLE} (exercise_id, rating_sum, rating_count, {buckets}) "
+        f"SELECT exercise_id, SUM(value), COUNT(*), {bucket_sums} FROM ratings "
+        f"WHERE exercise_id IS NOT NULL GROUP BY exercise_id"
+    )
+    connection.exec_driver_sql(
+        f"UPDATE exercises SET rating_avg = COALESCE((SELECT CAST(rating_sum AS FLOAT) / rating_count "
+        f"FROM {STATS_TABLE} WHERE exercise_id = exercises.id AND rating_count > 0), 0)"
+    )
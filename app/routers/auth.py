@@ -2,15 +2,24 @@ from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from .. import models, schemas, auth
 from ..database import get_db
 
 router = APIRouter()
 
+def _save_user(db: Session, db_user: models.User) -> models.User:
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+# Async so that bcrypt waits on the password pool instead of holding a threadpool worker;
+# database calls still run on the threadpool
 @router.post("/register", response_model=schemas.User)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     # Check if username already exists
-    db_user = db.query(models.User).filter(models.User.username == user.username).first()
+    db_user = await run_in_threadpool(auth.get_user_by_username, db, user.username)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -18,22 +27,19 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = auth.get_password_hash(user.password)
+    hashed_password = await auth.get_password_hash_async(user.password)
     db_user = models.User(
         username=user.username,
         hashed_password=hashed_password
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return await run_in_threadpool(_save_user, db, db_user)
 
 @router.post("/token", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth.authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -43,10 +49,10 @@ def login_for_access_token(
     
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
-        data={"sub": user.username},
+        data={"sub": user.username, "uid": user.id},
         expires_delta=access_token_expires
     )
-    refresh_token = auth.create_refresh_token(data={"sub": user.username})
+    refresh_token = auth.create_refresh_token(data={"sub": user.username, "uid": user.id})
     
     return {
         "access_token": access_token,
@@ -86,10 +92,10 @@ def refresh_token(
     
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
-        data={"sub": username},
+        data={"sub": username, "uid": user.id},
         expires_delta=access_token_expires
     )
-    refresh_token = auth.create_refresh_token(data={"sub": username})
+    refresh_token = auth.create_refresh_token(data={"sub": username, "uid": user.id})
     
     return {
         "access_token": access_token,
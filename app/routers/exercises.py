@@ -1,58 +1,112 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Body, Depends, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from .. import models, schemas, auth, cache
-from ..database import get_db
-from ..utils import InteractionType, validate_interaction_type
+from typing import Any, Dict, List, Optional
+from .. import models, schemas, auth, cache, cache_helpers, trending
+from ..database import get_db, get_async_db
+from ..utils import validate_interaction_type, is_valid_uuid
 from ..exceptions import validation_error, ErrorMessage
 from ..helpers.exercise_helpers import (
     get_exercise_or_404,
     check_exercise_access,
     check_exercise_modification,
     handle_exercise_interaction,
-    prepare_exercise_response
+    prepare_exercise_response,
+    prepare_exercises_response,
+    build_exercise_query,
+    read_exercise_response,
+    read_exercises_batch_response,
+    read_trending_exercises_response,
+    get_exercise_payload,
+    parse_exercise_sort
+)
+from ..helpers.pagination import (
+    paginate_keyset,
+    paginate_keyset_response,
+    stream_keyset_ndjson,
+    DEFAULT_PAGE_SIZE,
+    NEXT_CURSOR_HEADER
+)
+from ..helpers.rating_helpers import upsert_rating, get_rating_summary
+from ..helpers.export_helpers import stream_exercise_export, EXPORT_MEDIA_TYPES
+from ..helpers.bulk_helpers import (
+    bulk_create_exercises,
+    bulk_update_exercises,
+    bulk_delete_exercises,
+    bulk_update_interactions
 )
 from uuid import UUID
-from datetime import datetime
 
 router = APIRouter()
 
+# Most ids accepted by GET /exercises/batch
+BATCH_MAX_IDS = 100
+# Most items accepted by one bulk create/update/delete request
+BULK_MAX_ITEMS = 5000
+
 @router.get("/", response_model=List[schemas.Exercise])
 def read_exercises(
     skip: int = 0,
     limit: int = 100,
     sort_by_difficulty: bool = False,
+    sort: Optional[str] = None,
     name: Optional[str] = None,
     description: Optional[str] = None,
     difficulty_level: Optional[int] = None,
+    q: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: Optional[models.User] = Depends(auth.get_optional_current_user)
 ):
-    """Get a list of exercises with optional filtering and sorting"""
-    # Base query for public exercises
-    query = db.query(models.Exercise).filter(models.Exercise.is_public == True)
-    
-    # If user is authenticated, also include their private exercises
-    if current_user:
-        query = db.query(models.Exercise).filter(
-            (models.Exercise.is_public == True) | 
-            (models.Exercise.creator_id == current_user.id)
-        )
-    
-    # Apply filters
-    if name:
-        query = query.filter(models.Exercise.name.ilike(f"%{name}%"))
-    if description:
-        query = query.filter(models.Exercise.description.ilike(f"%{description}%"))
-    if difficulty_level:
-        query = query.filter(models.Exercise.difficulty_level == difficulty_level)
+    """Get a list of exercises with optional filtering and sorting.
+    sort is one of id, difficulty, created_at, favorite_count or rating, with a leading '-'
+    for descending; sort_by_difficulty is shorthand for sort=difficulty.
+    q runs a full-text search; results are ranked by relevance unless sorted."""
+    if sort_by_difficulty and not sort:
+        sort = "difficulty"
+    query = build_exercise_query(
+        db, current_user, name, description, difficulty_level,
+        q=q, rank_by_relevance=not sort
+    )
     
     # Apply sorting
-    if sort_by_difficulty:
-        query = query.order_by(models.Exercise.difficulty_level)
+    if sort:
+        columns, descending = parse_exercise_sort(sort)
+        query = query.order_by(*(column.desc() if descending else column for column in columns))
     
     exercises = query.offset(skip).limit(limit).all()
-    return [prepare_exercise_response(exercise, current_user) for exercise in exercises]
+    return prepare_exercises_response(db, exercises, current_user)
+
+@router.get("/page", response_model=schemas.ExerciseList)
+def read_exercises_page(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    sort_by_difficulty: bool = False,
+    sort: Optional[str] = None,
+    name: Optional[str] = None,
+    description: Optional[str] = None,
+    difficulty_level: Optional[int] = None,
+    q: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: Optional[models.User] = Depends(auth.get_optional_current_user)
+):
+    """Get a page of exercises using cursor (keyset) pagination.
+    Pass the returned next_cursor back as cursor to fetch the following page;
+    the cost of a page does not depend on how deep it is, for every sort order.
+    sort takes the same values as the list endpoint. q filters by full-text search."""
+    sort = sort or ("difficulty" if sort_by_difficulty else "id")
+    columns, descending = parse_exercise_sort(sort)
+    query = build_exercise_query(db, current_user, name, description, difficulty_level, q=q)
+    exercises, next_cursor = paginate_keyset(
+        query, columns, sort, cursor, limit, descending=descending
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return {
+        "exercises": prepare_exercises_response(db, exercises, current_user),
+        "next_cursor": next_cursor,
+        "per_page": limit
+    }
 
 @router.post("/", response_model=schemas.Exercise)
 def create_exercise(
@@ -66,6 +120,57 @@ def create_exercise(
     db.refresh(db_exercise)
     return db_exercise
 
+@router.post("/bulk", response_model=schemas.BulkResult)
+def create_exercises_bulk(
+    items: List[Dict[str, Any]] = Body(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Create many exercises in one transaction.
+    Each item is validated as ExerciseCreate; invalid items are reported and skipped."""
+    if len(items) > BULK_MAX_ITEMS:
+        raise validation_error(ErrorMessage.TOO_MANY_ITEMS)
+    return bulk_create_exercises(db, items, current_user)
+
+@router.patch("/bulk", response_model=schemas.BulkResult)
+def update_exercises_bulk(
+    items: List[Dict[str, Any]] = Body(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Apply partial updates ({"id": ..., fields}) to many exercises in one transaction"""
+    if len(items) > BULK_MAX_ITEMS:
+        raise validation_error(ErrorMessage.TOO_MANY_ITEMS)
+    return bulk_update_exercises(db, items, current_user)
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+def delete_exercises_bulk(
+    request: schemas.ExerciseBulkDelete,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Delete many of the user's exercises in one transaction"""
+    if len(request.ids) > BULK_MAX_ITEMS:
+        raise validation_error(ErrorMessage.TOO_MANY_ITEMS)
+    return bulk_delete_exercises(db, request.ids, current_user)
+
+@router.post("/bulk/interactions", response_model=schemas.BulkInteractionResult)
+def update_interactions_bulk(
+    request: schemas.BulkInteractionUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    """Favorite/unfavorite or save/unsave many exercises at once.
+    Adding an existing interaction or removing a missing one is a no-op."""
+    interaction_type = validate_interaction_type(request.interaction_type)
+    if not interaction_type:
+        raise validation_error(ErrorMessage.INVALID_INTERACTION_TYPE)
+    if len(request.add) + len(request.remove) > BULK_MAX_ITEMS:
+        raise validation_error(ErrorMessage.TOO_MANY_ITEMS)
+    if set(request.add) & set(request.remove):
+        raise validation_error(ErrorMessage.CONFLICTING_INTERACTION_CHANGES)
+    return bulk_update_interactions(db, current_user, interaction_type.value, request.add, request.remove)
+
 @router.get("/personal", response_model=List[schemas.Exercise])
 def get_personal_exercises(
     type: Optional[str] = None,  # "favorites" or "saved" or None for both
@@ -81,39 +186,58 @@ def get_personal_exercises(
         exercises = list(set(current_user.favorite_exercises + current_user.saved_exercises))
     
     # Add counts and personal status
-    for exercise in exercises:
-        # Try to get counts from cache first
-        favorite_count = cache.get_cached_count("favorites", str(exercise.id))
-        save_count = cache.get_cached_count("saves", str(exercise.id))
-        
-        if favorite_count is None:
-            favorite_count = len(exercise.favorited_by)
-            cache.cache_count("favorites", str(exercise.id), favorite_count)
-        
-        if save_count is None:
-            save_count = len(exercise.saved_by)
-            cache.cache_count("saves", str(exercise.id), save_count)
-        
-        exercise.favorite_count = favorite_count
-        exercise.save_count = save_count
-        exercise.is_favorited = exercise in current_user.favorite_exercises
-        exercise.is_saved = exercise in current_user.saved_exercises
-    
-    return exercises
+    return prepare_exercises_response(db, exercises, current_user)
+
+@router.get("/batch", response_model=List[schemas.Exercise])
+async def read_exercises_batch(
+    ids: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Optional[models.User] = Depends(auth.get_optional_current_user)
+):
+    """Get up to BATCH_MAX_IDS exercises by comma-separated id, in the order requested.
+    Ids that do not exist or that the user cannot access are left out of the result."""
+    exercise_ids = [exercise_id.strip() for exercise_id in ids.split(",") if exercise_id.strip()]
+    if len(exercise_ids) > BATCH_MAX_IDS:
+        raise validation_error(ErrorMessage.TOO_MANY_IDS)
+    if not all(is_valid_uuid(exercise_id) for exercise_id in exercise_ids):
+        raise validation_error(ErrorMessage.INVALID_UUID)
+    return await read_exercises_batch_response(db, exercise_ids, current_user)
+
+@router.get("/export")
+def export_exercises(
+    format: str = "ndjson",
+    db: Session = Depends(get_db),
+    current_user: Optional[models.User] = Depends(auth.get_optional_current_user)
+):
+    """Stream the whole catalog visible to the user as NDJSON (default) or CSV"""
+    if format not in EXPORT_MEDIA_TYPES:
+        raise validation_error(ErrorMessage.INVALID_EXPORT_FORMAT)
+    return stream_exercise_export(db, format, current_user)
+
+@router.get("/trending", response_model=List[schemas.Exercise])
+def get_trending_exercises(
+    window: str = "7d",
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: Optional[models.User] = Depends(auth.get_optional_current_user)
+):
+    """Get the most favorited, saved and rated exercises of the window (1d, 7d or 30d),
+    with recent activity weighted above older activity. Exercises the user cannot see are skipped."""
+    if window not in trending.TRENDING_WINDOWS:
+        raise validation_error(ErrorMessage.INVALID_TRENDING_WINDOW)
+    return read_trending_exercises_response(db, window, limit, current_user)
 
 @router.get("/{exercise_id}", response_model=schemas.Exercise)
-def read_exercise(
+async def read_exercise(
     exercise_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[models.User] = Depends(auth.get_optional_current_user)
 ):
     """Get a specific exercise by ID"""
-    exercise = get_exercise_or_404(db, exercise_id)
-    check_exercise_access(exercise, current_user)
-    return prepare_exercise_response(exercise, current_user)
+    return await read_exercise_response(db, exercise_id, current_user)
 
 @router.put("/{exercise_id}", response_model=schemas.Exercise)
-async def update_exercise(
+def update_exercise(
     exercise_id: str,
     exercise_update: schemas.ExerciseUpdate,
     current_user: models.User = Depends(auth.get_current_user),
@@ -147,8 +271,6 @@ def delete_exercise(
     
     # Invalidate caches
     cache.invalidate_exercise_cache(str(exercise.id))
-    cache.cache_delete(cache.generate_key(f"{cache.COUNT_PREFIX}favorites:", str(exercise.id)))
-    cache.cache_delete(cache.generate_key(f"{cache.COUNT_PREFIX}saves:", str(exercise.id)))
     
     return {"message": "Exercise deleted"}
 
@@ -161,7 +283,6 @@ def favorite_exercise(
     """Favorite an exercise"""
     exercise = get_exercise_or_404(db, exercise_id)
     handle_exercise_interaction(exercise, current_user, "favorites", True)
-    db.commit()
     return prepare_exercise_response(exercise, current_user)
 
 @router.delete("/{exercise_id}/favorite", response_model=schemas.Exercise)
@@ -173,7 +294,6 @@ def unfavorite_exercise(
     """Remove favorite from an exercise"""
     exercise = get_exercise_or_404(db, exercise_id)
     handle_exercise_interaction(exercise, current_user, "favorites", False)
-    db.commit()
     return prepare_exercise_response(exercise, current_user)
 
 @router.post("/{exercise_id}/save", response_model=schemas.Exercise)
@@ -185,7 +305,6 @@ def save_exercise(
     """Save an exercise"""
     exercise = get_exercise_or_404(db, exercise_id)
     handle_exercise_interaction(exercise, current_user, "saves", True)
-    db.commit()
     return prepare_exercise_response(exercise, current_user)
 
 @router.delete("/{exercise_id}/save", response_model=schemas.Exercise)
@@ -197,23 +316,37 @@ def unsave_exercise(
     """Remove save from an exercise"""
     exercise = get_exercise_or_404(db, exercise_id)
     handle_exercise_interaction(exercise, current_user, "saves", False)
-    db.commit()
     return prepare_exercise_response(exercise, current_user)
 
 @router.get("/{exercise_id}/interactions", response_model=List[schemas.User])
 def get_exercise_interactions(
     exercise_id: str,
     interaction_type: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=1000),
+    stream: bool = False,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    """Get users who have interacted with an exercise"""
+    """Get users who have interacted with an exercise, a page at a time.
+    Pages hold limit users, 100 by default, and the next page's cursor is in the
+    X-Next-Cursor header. stream=true streams every user from the cursor onwards as
+    NDJSON instead, for callers that want the whole list."""
     exercise = get_exercise_or_404(db, exercise_id)
     validated_type = validate_interaction_type(interaction_type)
     if not validated_type:
         raise validation_error(ErrorMessage.INVALID_INTERACTION_TYPE)
     
-    return exercise.favorited_by if validated_type == InteractionType.FAVORITE else exercise.saved_by
+    interaction = cache_helpers.INTERACTION_MODELS[validated_type.value]
+    query = db.query(models.User).join(interaction, interaction.user_id == models.User.id).filter(
+        interaction.exercise_id == exercise.id
+    )
+    # Keyset on the join table's user_id so pages come straight off its (exercise_id, user_id) index
+    columns, values_of = (interaction.user_id,), lambda user: (user.id,)
+    if stream:
+        return stream_keyset_ndjson(query, columns, "id", cursor, schemas.User, values_of=values_of)
+    return paginate_keyset_response(response, query, columns, "id", cursor, limit, values_of)
 
 @router.post("/{exercise_id}/rate", response_model=schemas.Rating)
 def rate_exercise(
@@ -222,41 +355,46 @@ def rate_exercise(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    exercise = db.query(models.Exercise).filter(models.Exercise.id == str(exercise_id)).first()
-    if not exercise:
+    stored_rating, created = upsert_rating(db, str(exercise_id), current_user.id, rating.value)
+    if stored_rating is None:
         raise validation_error(ErrorMessage.EXERCISE_NOT_FOUND)
-
-    existing_rating = db.query(models.Rating).filter(
-        models.Rating.exercise_id == str(exercise_id),
-        models.Rating.user_id == current_user.id
-    ).first()
-
-    if existing_rating:
-        existing_rating.value = rating.value
-        existing_rating.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(existing_rating)
-        return existing_rating
-
-    new_rating = models.Rating(
-        value=rating.value,
-        exercise_id=str(exercise_id),
-        user_id=current_user.id
-    )
-    db.add(new_rating)
-    db.commit()
-    db.refresh(new_rating)
-    return new_rating
+    # The cached payload carries the rating aggregates
+    cache.invalidate_exercise_cache(str(exercise_id))
+    # Changing a rating is not new interest in the exercise
+    if created:
+        trending.record_interaction(str(exercise_id), "ratings")
+    return stored_rating
 
 @router.get("/{exercise_id}/ratings", response_model=List[schemas.Rating])
 def get_exercise_ratings(
     exercise_id: UUID,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=1000),
+    stream: bool = False,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
+    """Get an exercise's ratings a page at a time.
+    Pages hold limit ratings, 100 by default, and the next page's cursor is in the
+    X-Next-Cursor header. stream=true streams every rating from the cursor onwards as
+    NDJSON instead, for callers that want the whole list."""
     exercise = db.query(models.Exercise).filter(models.Exercise.id == str(exercise_id)).first()
     if not exercise:
         raise validation_error(ErrorMessage.EXERCISE_NOT_FOUND)
 
-    ratings = db.query(models.Rating).filter(models.Rating.exercise_id == str(exercise_id)).all()
-    return ratings 
\ No newline at end of file
+    query = db.query(models.Rating).filter(models.Rating.exercise_id == str(exercise_id))
+    if stream:
+        return stream_keyset_ndjson(query, (models.Rating.id,), "id", cursor, schemas.Rating)
+    return paginate_keyset_response(response, query, (models.Rating.id,), "id", cursor, limit)
+
+@router.get("/{exercise_id}/ratings/summary", response_model=schemas.RatingSummary)
+async def get_exercise_rating_summary(
+    exercise_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Optional[models.User] = Depends(auth.get_optional_current_user)
+):
+    """Get the rating average, count and histogram from the maintained aggregates"""
+    exercise = schemas.Exercise.model_validate(await get_exercise_payload(db, str(exercise_id)))
+    check_exercise_access(exercise, current_user)
+    return await get_rating_summary(db, str(exercise_id))
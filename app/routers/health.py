@@ -1,24 +1,24 @@
 from fastapi import APIRouter, Depends
 from datetime import datetime
-from app.schemas import HealthCheck, RedisHealth
-from app.database import get_db
-from sqlalchemy.orm import Session
+from app.schemas import HealthCheck, RedisHealth, CacheStats, PasswordPoolStats
+from app.database import get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from app import cache
+from app import auth, cache
 
 router = APIRouter()
 
 @router.get("", response_model=HealthCheck)
-async def check_health(db: Session = Depends(get_db)):
+async def check_health(db: AsyncSession = Depends(get_async_db)):
     """
     Check the health status of the application and its dependencies
     """
     try:
         # Check database connection
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         
         # Check Redis connection
-        is_healthy, message = cache.check_redis_connection()
+        is_healthy, message = await cache.async_check_redis_connection()
         redis_health = RedisHealth(
             status="healthy" if is_healthy else "unhealthy",
             message=message,
@@ -42,9 +42,31 @@ async def check_redis_health():
     """
     Check Redis connection health specifically
     """
-    is_healthy, message = cache.check_redis_connection()
+    is_healthy, message = await cache.async_check_redis_connection()
+    breaker = cache.get_redis_breaker_state()
     return RedisHealth(
         status="healthy" if is_healthy else "unhealthy",
         message=message,
+        circuit_state=breaker["state"],
+        consecutive_failures=breaker["consecutive_failures"],
         timestamp=datetime.utcnow()
-    ) 
\ No newline at end of file
+    ) 
+
+@router.get("/cache", response_model=CacheStats)
+async def check_cache_stats():
+    """
+    Report hit ratios for the local and Redis cache tiers and the auth caches
+    """
+    return CacheStats(
+        **cache.get_cache_stats(),
+        principal=auth.principal_cache.stats.as_dict(),
+        token=auth.token_cache.stats.as_dict(),
+        timestamp=datetime.utcnow()
+    )
+
+@router.get("/password-pool", response_model=PasswordPoolStats)
+async def check_password_pool():
+    """
+    Report load on the password hashing pool
+    """
+    return PasswordPoolStats(**auth.password_pool.stats(), timestamp=datetime.utcnow())
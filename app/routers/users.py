@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from .. import models, schemas, database, auth, cache_helpers
 from ..database import get_db
-from ..utils import InteractionType, validate_interaction_type
+from ..utils import validate_interaction_type
+from ..helpers.exercise_helpers import prepare_exercises_response
+from ..helpers.pagination import DEFAULT_PAGE_SIZE, paginate_keyset_response, stream_keyset_ndjson
 from uuid import UUID
 
 router = APIRouter()
@@ -40,18 +42,24 @@ def get_user_exercises(
     exercises = db.query(models.Exercise).filter(models.Exercise.creator_id == str(user_id)).all()
     
     # Add interaction counts and status
-    for exercise in exercises:
-        cache_helpers.update_exercise_interaction_status(exercise, current_user)
-    
+    prepare_exercises_response(db, exercises, current_user)
     return exercises
 
 @router.get("/{user_id}/interactions", response_model=List[schemas.Exercise])
 def get_user_interactions(
     user_id: UUID,
     interaction_type: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=1000),
+    stream: bool = False,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
+    """Get exercises the user has favorited or saved, a page at a time.
+    Pages hold limit exercises, 100 by default, and the next page's cursor is in the
+    X-Next-Cursor header. stream=true streams every exercise from the cursor onwards as
+    NDJSON instead, for callers that want the whole list."""
     user = db.query(models.User).filter(models.User.id == str(user_id)).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -60,10 +68,18 @@ def get_user_interactions(
     if not validated_type:
         raise HTTPException(status_code=422, detail="Invalid interaction type. Must be 'favorites' or 'saves'")
     
-    exercises = user.favorite_exercises if validated_type == InteractionType.FAVORITE else user.saved_exercises
+    interaction = cache_helpers.INTERACTION_MODELS[validated_type.value]
+    query = db.query(models.Exercise).join(interaction, interaction.exercise_id == models.Exercise.id).filter(
+        interaction.user_id == user.id
+    )
     
     # Add interaction counts and status
-    for exercise in exercises:
-        cache_helpers.update_exercise_interaction_status(exercise, current_user)
-    
+    def prepare(exercises):
+        prepare_exercises_response(db, exercises, current_user)
+    # Keyset on the join table's exercise_id so pages come straight off its (user_id, exercise_id) index
+    columns, values_of = (interaction.exercise_id,), lambda exercise: (exercise.id,)
+    if stream:
+        return stream_keyset_ndjson(query, columns, "id", cursor, schemas.Exercise, prepare, values_of=values_of)
+    exercises = paginate_keyset_response(response, query, columns, "id", cursor, limit, values_of)
+    prepare(exercises)
     return exercises 
\ No newline at end of file
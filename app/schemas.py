@@ -1,5 +1,5 @@
 from pydantic import BaseModel, conint, ConfigDict, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from uuid import UUID
 
@@ -42,6 +42,17 @@ class ExerciseUpdate(BaseModel):
     difficulty_level: Optional[conint(ge=1, le=5)] = None
     is_public: Optional[bool] = None
 
+class ExerciseBulkUpdate(ExerciseUpdate):
+    id: str
+
+class ExerciseBulkDelete(BaseModel):
+    ids: List[str]
+
+class BulkInteractionUpdate(BaseModel):
+    interaction_type: str  # "favorites" or "saves"
+    add: List[str] = []
+    remove: List[str] = []
+
 class Exercise(ExerciseBase):
     id: str
     creator_id: Optional[str] = None
@@ -49,6 +60,8 @@ class Exercise(ExerciseBase):
     updated_at: Optional[datetime] = None
     favorite_count: Optional[int] = 0
     save_count: Optional[int] = 0
+    avg_rating: Optional[float] = None
+    rating_count: Optional[int] = 0
     user_rating: Optional[float] = None
     is_favorited: Optional[bool] = False
     is_saved: Optional[bool] = False
@@ -71,10 +84,32 @@ class Rating(BaseModel):
         from_attributes = True
 
 # Response schemas
+class RatingSummary(BaseModel):
+    exercise_id: str
+    avg_rating: Optional[float] = None
+    rating_count: int
+    histogram: Dict[int, int]
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str  # "created", "updated", "deleted" or "error"
+    detail: Optional[str] = None
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
+    succeeded: int
+    failed: int
+
+class BulkInteractionResult(BaseModel):
+    added: List[str]
+    removed: List[str]
+    # Exercises that could not be added, with the reason
+    failed: Dict[str, str]
+
 class ExerciseList(BaseModel):
     exercises: List[Exercise]
-    total: int
-    page: int
+    next_cursor: Optional[str] = None
     per_page: int
 
 class Message(BaseModel):
@@ -84,9 +119,33 @@ class Message(BaseModel):
 class RedisHealth(BaseModel):
     status: str
     message: str
+    circuit_state: Optional[str] = None
+    consecutive_failures: Optional[int] = None
     timestamp: datetime
 
 class HealthCheck(BaseModel):
     status: str
     redis_status: RedisHealth
-    timestamp: datetime 
\ No newline at end of file
+    timestamp: datetime 
+
+class CacheTierStats(BaseModel):
+    hits: int
+    misses: int
+    hit_ratio: float
+
+class CacheStats(BaseModel):
+    local_enabled: bool
+    local: Optional[CacheTierStats] = None
+    redis: CacheTierStats
+    principal: Optional[CacheTierStats] = None
+    token: Optional[CacheTierStats] = None
+    timestamp: datetime
+
+class PasswordPoolStats(BaseModel):
+    max_workers: int
+    max_queue: int
+    active: int
+    queued: int
+    completed: int
+    rejected: int
+    timestamp: datetime
@@ -0,0 +1,98 @@
+"""
+Full-text search for exercises.
+
+SQLite: an FTS5 index over exercises.name/description, kept in sync by triggers.
+It is an external-content table keyed on the exercises rowid, so run
+rebuild_search_index() after a VACUUM.
+
+PostgreSQL: a GIN index over the tsvector of name/description for ranked
+search, plus pg_trgm GIN indexes so the substring name/description filters
+can use an index.
+
+Other databases fall back to substring matching.
+"""
+import re
+from sqlalchemy import DDL, Table, event, literal_column, or_, table, column, func
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Query
+
+FTS_TABLE = "exercises_fts"
+
+SQLITE_CREATE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description, content='exercises', content_rowid='rowid'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS exercises_fts_ai AFTER INSERT ON exercises BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS exercises_fts_ad AFTER DELETE ON exercises BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.rowid, old.name, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS exercises_fts_au AFTER UPDATE OF name, description ON exercises BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.rowid, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END""",
+]
+SQLITE_DROP = [f"DROP TABLE IF EXISTS {FTS_TABLE}"]
+
+# Must match the expression used in queries for the planner to pick the index
+PG_DOCUMENT = "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))"
+
+PG_PREPARE = ["CREATE EXTENSION IF NOT EXISTS pg_trgm"]
+PG_CREATE = [
+    f"CREATE INDEX IF NOT EXISTS idx_exercise_fts ON exercises USING gin ({PG_DOCUMENT})",
+    "CREATE INDEX IF NOT EXISTS idx_exercise_name_trgm ON exercises USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_exercise_description_trgm ON exercises USING gin (description gin_trgm_ops)",
+]
+
+def register_search_ddl(exercises: Table) -> None:
+    """Create and drop the search structures together with the exercises table"""
+    for statement in PG_PREPARE:
+        event.listen(exercises, "before_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in PG_CREATE:
+        event.listen(exercises, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in SQLITE_CREATE:
+        event.listen(exercises, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    for statement in SQLITE_DROP:
+        event.listen(exercises, "before_drop", DDL(statement).execute_if(dialect="sqlite"))
+
+def rebuild_search_index(connection: Connection) -> None:
+    """Rebuild the SQLite FTS index from the exercises table"""
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+def to_fts5_query(q: str) -> str:
+    """Turn free text into an FTS5 query: every term must match, the last one as a prefix"""
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+def apply_search(query: Query, q: str, rank: bool = False) -> Query:
+    """Restrict an exercise query to rows matching q, optionally ordered by relevance"""
+    dialect = query.session.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        match = to_fts5_query(q)
+        if not match:
+            return query
+        fts = table(FTS_TABLE, column("rowid"), column("rank"))
+        query = query.join(fts, fts.c.rowid == literal_column("exercises.rowid")).filter(
+            literal_column(FTS_TABLE).op("MATCH")(match)
+        )
+        # FTS5's hidden rank column is bm25(), lower is better
+        return query.order_by(fts.c.rank) if rank else query
+
+    if dialect == "postgresql":
+        document = literal_column(PG_DOCUMENT)
+        ts_query = func.websearch_to_tsquery("english", q)
+        query = query.filter(document.op("@@")(ts_query))
+        return query.order_by(func.ts_rank(document, ts_query).desc()) if rank else query
+
+    pattern = f"%{q}%"
+    return query.filter(or_(literal_column("exercises.name").ilike(pattern),
+                            literal_column("exercises.description").ilike(pattern)))
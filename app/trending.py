@@ -0,0 +1,143 @@
+"""
+Trending exercises leaderboard.
+
+Every favorite, save and rating adds its weight to the exercise's score in a
+Redis sorted set for the current hour; removing a favorite or save takes the
+weight back from the hour it was added in. A window's leaderboard is the union of
+its hourly sets, weighted so older hours decay, and is merged at most once per
+TRENDING_MERGE_INTERVAL; reading the top N of the merged set is O(log n + N).
+When Redis is unavailable the ranking is computed from the database instead.
+"""
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.orm import Session
+from . import cache, models
+
+TRENDING_PREFIX = "trending:"
+TRENDING_BUCKET_SECONDS = 3600
+TRENDING_MERGE_INTERVAL = int(os.getenv('TRENDING_MERGE_INTERVAL', '60'))
+# A bucket at the far edge of a window is worth 0.5 ** TRENDING_DECAY_HALF_LIVES of a current one
+TRENDING_DECAY_HALF_LIVES = 4
+
+TRENDING_WINDOWS = {
+    "1d": 24,
+    "7d": 7 * 24,
+    "30d": 30 * 24,
+}
+
+INTERACTION_WEIGHTS = {
+    "favorites": 3.0,
+    "saves": 2.0,
+    "ratings": 1.0,
+}
+
+def _bucket(now: Optional[float] = None) -> int:
+    return int((time.time() if now is None else now) // TRENDING_BUCKET_SECONDS)
+
+def _bucket_key(bucket: int) -> str:
+    return f"{TRENDING_PREFIX}bucket:{bucket}"
+
+def _merged_key(window: str) -> str:
+    return f"{TRENDING_PREFIX}window:{window}"
+
+def _bucket_expiry(bucket: int) -> int:
+    """When a bucket drops out of the longest window"""
+    return (bucket + max(TRENDING_WINDOWS.values()) + 1) * TRENDING_BUCKET_SECONDS
+
+def record_interaction(
+    exercise_id: str,
+    interaction_type: str,
+    add: bool = True,
+    created_at: Optional[datetime] = None
+) -> bool:
+    """Add an interaction's weight to the current bucket, or for a removed favorite/save
+    take it back from the bucket of the hour it was added (created_at, in UTC)"""
+    if add:
+        return record_interactions(interaction_type, [exercise_id], [])
+    return record_interactions(interaction_type, [], [(exercise_id, created_at)])
+
+def record_interactions(
+    interaction_type: str,
+    added: List[str],
+    removed: List[Tuple[str, Optional[datetime]]]
+) -> bool:
+    """record_interaction for many exercises in one pipeline.
+    A removal whose add is older than the longest window no longer counts anywhere and is skipped."""
+    weight = INTERACTION_WEIGHTS[interaction_type]
+    current = _bucket()
+    increments = [(current, exercise_id, weight) for exercise_id in added]
+    for exercise_id, created_at in removed:
+        if created_at is None:
+            continue
+        bucket = _bucket(created_at.replace(tzinfo=timezone.utc).timestamp())
+        if current - bucket < max(TRENDING_WINDOWS.values()):
+            increments.append((bucket, exercise_id, -weight))
+    if not increments:
+        return True
+    try:
+        pipe = cache.redis_client.pipeline(transaction=False)
+        for bucket, exercise_id, amount in increments:
+            pipe.zincrby(_bucket_key(bucket), amount, exercise_id)
+        # Keep each bucket for as long as the longest window can still read it
+        for bucket in {bucket for bucket, _, _ in increments}:
+            pipe.expireat(_bucket_key(bucket), _bucket_expiry(bucket))
+        with cache.redis_call():
+            pipe.execute()
+        return True
+    except Exception:
+        return False
+
+def merge_window(window: str, now: Optional[float] = None) -> None:
+    """Rebuild a window's leaderboard from its hourly buckets with decay weights"""
+    hours = TRENDING_WINDOWS[window]
+    current = _bucket(now)
+    weights = {
+        _bucket_key(current - age): 0.5 ** (TRENDING_DECAY_HALF_LIVES * age / hours)
+        for age in range(hours)
+    }
+    pipe = cache.redis_client.pipeline(transaction=False)
+    pipe.zunionstore(_merged_key(window), weights)
+    pipe.expire(_merged_key(window), TRENDING_MERGE_INTERVAL)
+    with cache.redis_call():
+        pipe.execute()
+
+def get_trending_ids(window: str, limit: int, offset: int = 0) -> List[Tuple[str, float]]:
+    """Exercise ids and scores for a window, best first from offset, merging the window if it is stale.
+    Raises if Redis is unavailable."""
+    key = _merged_key(window)
+    with cache.redis_call():
+        merged = cache.redis_client.exists(key)
+    if not merged:
+        merge_window(window)
+    with cache.redis_call():
+        ranked = cache.redis_client.zrevrange(key, offset, offset + limit - 1, withscores=True)
+    return [(exercise_id, score) for exercise_id, score in ranked if score > 0]
+
+def get_trending_ids_from_db(db: Session, window: str, limit: int, offset: int = 0) -> List[Tuple[str, float]]:
+    """Weighted interaction counts within the window, without decay, for when Redis is down"""
+    since = datetime.utcnow() - timedelta(hours=TRENDING_WINDOWS[window])
+    # By created_at: a changed rating is not new interest, as in record_interaction
+    events = union_all(*(
+        select(model.exercise_id, literal(INTERACTION_WEIGHTS[name]).label("weight")).where(model.created_at >= since)
+        for name, model in (("favorites", models.Favorite), ("saves", models.Save), ("ratings", models.Rating))
+    )).subquery()
+    score = func.sum(events.c.weight).label("score")
+    rows = db.execute(
+        select(events.c.exercise_id, score)
+        .group_by(events.c.exercise_id)
+        .order_by(score.desc(), events.c.exercise_id)
+        .offset(offset)
+        .limit(limit)
+    ).all()
+    return [(exercise_id, float(score)) for exercise_id, score in rows]
+
+def get_trending(db: Session, window: str, limit: int, offset: int = 0) -> Dict[str, float]:
+    """Ranked exercise ids and scores from Redis, falling back to the database"""
+    try:
+        ranked = get_trending_ids(window, limit, offset)
+    except Exception:
+        ranked = get_trending_ids_from_db(db, window, limit, offset)
+    return dict(ranked)
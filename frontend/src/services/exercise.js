@@ -48,6 +48,25 @@ const getExercise = async (id) => {
   }
 };
 
+// Get several exercises by ID in one request; missing or inaccessible ones are left out
+const getExercisesByIds = async (ids) => {
+  if (!ids.length) return [];
+  try {
+    const queryString = new URLSearchParams({ ids: ids.join(',') }).toString();
+    const response = await authService.authFetch(`/exercises/batch?${queryString}`);
+    
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || 'Failed to fetch exercises');
+    }
+    
+    return await response.json();
+  } catch (error) {
+    console.error('Error in getExercisesByIds:', error);
+    throw error;
+  }
+};
+
 // Get personal exercises (favorites or saved)
 const getPersonalExercises = async (type = null) => {
   try {
@@ -252,9 +271,33 @@ const rateExercise = async (id, rating) => {
   }
 };
 
+// Favorite/save (add) or unfavorite/unsave (remove) many exercises in one request
+const bulkUpdateInteractions = async (interactionType, add = [], remove = []) => {
+  try {
+    const response = await authService.authFetch('/exercises/bulk/interactions', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ interaction_type: interactionType, add, remove }),
+    });
+    
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || 'Failed to update exercises');
+    }
+    
+    return await response.json();
+  } catch (error) {
+    console.error('Error in bulkUpdateInteractions:', error);
+    throw error;
+  }
+};
+
 export const exerciseService = {
   getExercises,
   getExercise,
+  getExercisesByIds,
   getPersonalExercises,
   createExercise,
   updateExercise,
@@ -264,4 +307,5 @@ export const exerciseService = {
   saveExercise,
   unsaveExercise,
   rateExercise,
+  bulkUpdateInteractions,
 }; 
\ No newline at end of file
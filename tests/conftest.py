@@ -1,23 +1,33 @@
+import os
+import shutil
+import tempfile
+
+# Point the default engine at a scratch database before the app is imported,
+# so tests never migrate or write the real ./app.db
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="exercise-api-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DATA_DIR}/app.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 from app.main import app
-from app.database import Base, get_db
-
-# Use in-memory SQLite for testing
-SQLALCHEMY_DATABASE_URL = "sqlite://"
+from app.database import Base, get_db, get_async_db, engine, to_async_database_url
+from app.migrations import init_schema
 
 @pytest.fixture
-def test_db():
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
+def test_db(tmp_path):
+    # A scratch file rather than :memory:, so the async routes can open it through aiosqlite too
+    database_url = f"sqlite:///{tmp_path}/test.db"
+    engine = create_engine(database_url, connect_args={"check_same_thread": False})
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     Base.metadata.create_all(bind=engine)
+    async_engine = create_async_engine(to_async_database_url(database_url), poolclass=NullPool)
+    TestingAsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False,
+                                                  expire_on_commit=False)
 
     def override_get_db():
         try:
@@ -26,11 +36,19 @@ def test_db():
         finally:
             db.close()
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     
-    yield TestingSessionLocal()
+    session = TestingSessionLocal()
+    yield session
     
+    session.close()
     Base.metadata.drop_all(bind=engine)
+    engine.dispose()
 
 @pytest.fixture
 def client(test_db):
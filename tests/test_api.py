@@ -470,4 +470,28 @@ def test_health_check_redis(client):
     assert "redis_status" in data
     assert data["redis_status"]["status"] == "healthy"
     assert "message" in data["redis_status"]
-    assert "timestamp" in data["redis_status"] 
\ No newline at end of file
+    assert "timestamp" in data["redis_status"] 
+
+def test_health_check_redis_circuit_state(client):
+    response = client.get("/health/redis")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "healthy"
+    assert data["circuit_state"] == "closed"
+
+def test_health_check_cache_stats(client):
+    response = client.get("/health/cache")
+    assert response.status_code == 200
+    data = response.json()
+    assert "local_enabled" in data
+    assert 0.0 <= data["redis"]["hit_ratio"] <= 1.0
+    assert 0.0 <= data["token"]["hit_ratio"] <= 1.0
+    assert 0.0 <= data["principal"]["hit_ratio"] <= 1.0
+
+def test_health_check_password_pool(client):
+    create_test_user(client, "poolstatsuser")
+    response = client.get("/health/password-pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["max_workers"] == auth.password_pool.max_workers
+    assert data["completed"] >= 2
@@ -1,10 +1,13 @@
 import pytest
+import threading
 import uuid
 from datetime import timedelta
 from fastapi.testclient import TestClient
 from fastapi import HTTPException
+from sqlalchemy import event
 from app.main import app
-from app import auth, schemas, models
+from app import auth, schemas, models, password_benchmark
+from app.bounded_executor import BoundedExecutor, PoolFullError
 
 @pytest.fixture(autouse=True)
 def cleanup_db(test_db):
@@ -226,4 +229,122 @@ def test_auth_router_token(client):
     response = client.post("/auth/refresh", json={
         "refresh_token": "invalid_token"
     })
-    assert response.status_code == 401 
\ No newline at end of file
+    assert response.status_code == 401
+
+def test_get_current_user_uses_principal_cache(db):
+    """Test that repeat lookups for a token with a user id skip the users table"""
+    username = f"cacheduser_{uuid.uuid4().hex[:8]}"
+    db_user = auth.create_user(db, schemas.UserCreate(username=username, password="testpass123"))
+    token = auth.create_access_token(data={"sub": username, "uid": db_user.id})
+    auth.get_current_user(db, token)
+    db.expunge_all()
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    try:
+        current_user = auth.get_current_user(db, token)
+        assert current_user.id == db_user.id
+        assert current_user.username == username
+        assert current_user.exercises == []
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", record)
+    assert not any("FROM users" in statement for statement in statements)
+
+def test_principal_cache_invalidated_on_update(db):
+    """Test that renaming a user invalidates its cached principal"""
+    username = f"renameduser_{uuid.uuid4().hex[:8]}"
+    db_user = auth.create_user(db, schemas.UserCreate(username=username, password="testpass123"))
+    token = auth.create_access_token(data={"sub": username, "uid": db_user.id})
+    auth.get_current_user(db, token)
+    assert auth.get_cached_principal(db_user.id)["username"] == username
+
+    db_user.username = f"{username}_new"
+    db.commit()
+    assert auth.get_cached_principal(db_user.id) is None
+    with pytest.raises(HTTPException) as exc_info:
+        auth.get_current_user(db, token)
+    assert "user not found" in exc_info.value.detail.lower()
+
+def test_bounded_executor_rejects_when_full():
+    """Test that the bounded pool sheds calls beyond workers plus queue"""
+    pool = BoundedExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+    try:
+        running = pool.submit(release.wait)
+        queued = pool.submit(lambda: "queued")
+        with pytest.raises(PoolFullError):
+            pool.submit(lambda: "rejected")
+        assert pool.stats()["rejected"] == 1
+        release.set()
+        assert queued.result(timeout=5) == "queued"
+        running.result(timeout=5)
+        assert pool.submit(lambda: "admitted").result(timeout=5) == "admitted"
+    finally:
+        release.set()
+        pool.shutdown()
+
+def test_login_sheds_with_503_when_password_pool_full(client, monkeypatch):
+    """Test that logins get 503 instead of queueing without bound"""
+    username = f"shedduser_{uuid.uuid4().hex[:8]}"
+    client.post("/auth/register", json={"username": username, "password": "testpass123"})
+
+    pool = BoundedExecutor(max_workers=1, max_queue=0)
+    monkeypatch.setattr(auth, "password_pool", pool)
+    release = threading.Event()
+    try:
+        blocker = pool.submit(release.wait)
+        response = client.post("/auth/token", data={"username": username, "password": "testpass123"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(auth.PASSWORD_POOL_RETRY_AFTER)
+
+        release.set()
+        blocker.result(timeout=5)
+        response = client.post("/auth/token", data={"username": username, "password": "testpass123"})
+        assert response.status_code == 200
+    finally:
+        release.set()
+        pool.shutdown()
+
+def test_authenticate_user_upgrades_outdated_hash(db, monkeypatch):
+    """Test that logging in rehashes a password made with an outdated cost"""
+    username = f"rehashuser_{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(auth, "pwd_context", auth.build_crypt_context(["bcrypt"], 4))
+    db_user = auth.create_user(db, schemas.UserCreate(username=username, password="testpass123"))
+    old_hash = db_user.hashed_password
+
+    monkeypatch.setattr(auth, "pwd_context", auth.build_crypt_context(["bcrypt"], 5))
+    assert auth.pwd_context.needs_update(old_hash)
+    assert auth.authenticate_user(db, username, "wrongpass") is None
+    assert db_user.hashed_password == old_hash
+
+    assert auth.authenticate_user(db, username, "testpass123").id == db_user.id
+    db.refresh(db_user)
+    assert db_user.hashed_password != old_hash
+    assert not auth.pwd_context.needs_update(db_user.hashed_password)
+    assert auth.verify_password("testpass123", db_user.hashed_password)
+
+def test_password_benchmark_reports_each_setting():
+    """Test that the benchmark times every requested cost"""
+    result = password_benchmark.benchmark("bcrypt", 4, iterations=1)
+    assert result["rounds"] == 4
+    assert result["hash_ms"] > 0 and result["verify_ms"] > 0
+
+def test_verify_token_caches_verified_payload(monkeypatch):
+    """Test that a repeat token is served from the decode cache until it expires"""
+    token = auth.create_access_token(data={"sub": f"decodeuser_{uuid.uuid4().hex[:8]}"})
+    auth.token_cache.stats.reset()
+    payload = auth.verify_token(token)
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("token should not be decoded again")
+    monkeypatch.setattr(auth.jwt, "decode", fail_decode)
+    assert auth.verify_token(token) == payload
+    assert auth.token_cache.stats.as_dict()["hits"] == 1
+    assert auth.token_cache.stats.as_dict()["misses"] == 1
+
+    # Cached access tokens are still rejected as refresh tokens
+    with pytest.raises(HTTPException) as exc_info:
+        auth.verify_token(token, refresh_token=True)
+    assert "invalid refresh token" in exc_info.value.detail.lower()
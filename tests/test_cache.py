@@ -1,5 +1,12 @@
+import asyncio
+import json
+import time
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from app import cache
+from app.local_cache import LocalCache
+from app.circuit_breaker import CircuitBreaker
+from redis.exceptions import ConnectionError as RedisConnectionError
 from datetime import timedelta
 
 @pytest.fixture(autouse=True)
@@ -58,23 +65,9 @@ def test_exercise_cache():
     assert cache.invalidate_exercise_cache("123")
     assert cache.get_cached_exercise("123") is None
 
-def test_counter_cache():
-    # Test setting counter
-    assert cache.cache_count("favorites", "123", 5)
-    assert cache.get_cached_count("favorites", "123") == 5
-    
-    # Test incrementing counter
-    assert cache.increment_count("favorites", "123") == 6
-    assert cache.get_cached_count("favorites", "123") == 6
-    
-    # Test decrementing counter
-    assert cache.decrement_count("favorites", "123") == 5
-    assert cache.get_cached_count("favorites", "123") == 5
-
 def test_key_generation():
     assert cache.generate_key(cache.EXERCISE_PREFIX, "123") == "exercise:123"
     assert cache.generate_key(cache.USER_PREFIX, "456") == "user:456"
-    assert cache.generate_key(cache.COUNT_PREFIX, "789") == "count:789"
 
 def test_redis_connection():
     is_healthy, message = cache.check_redis_connection()
@@ -89,4 +82,176 @@ def test_cache_error_handling():
     # Test increment/decrement with non-numeric value
     cache.redis_client.set("test:non-numeric", "not a number")
     assert cache.cache_increment("test:non-numeric") is None
-    assert cache.cache_decrement("test:non-numeric") is None 
\ No newline at end of file
+    assert cache.cache_decrement("test:non-numeric") is None 
+
+def test_local_cache_lru_and_ttl():
+    local = LocalCache(max_size=2, ttl=30)
+    local.set("a", "1")
+    local.set("b", "2")
+    assert local.get("a") == "1"
+    
+    # Least recently used entry is evicted when full
+    local.set("c", "3")
+    assert local.get("b") is None
+    assert local.get("a") == "1"
+    assert local.get("c") == "3"
+    
+    # Entries expire after their TTL
+    local.set("d", "4", ttl=0)
+    assert local.get("d") is None
+    assert local.stats.as_dict()["hits"] == 3
+
+def test_two_tier_cache(monkeypatch):
+    monkeypatch.setattr(cache, "local_cache", LocalCache(max_size=100, ttl=30))
+    
+    # Reads populate the local tier, later reads do not reach Redis
+    cache.redis_client.set("test:tiered", json.dumps({"v": 1}))
+    assert cache.cache_get("test:tiered") == {"v": 1}
+    cache.redis_client.set("test:tiered", json.dumps({"v": 2}))
+    assert cache.cache_get("test:tiered") == {"v": 1}
+    
+    # Messages from this worker are ignored, other workers' invalidate
+    cache.handle_invalidation_message(json.dumps({"worker": cache.WORKER_ID, "keys": ["test:tiered"]}))
+    assert cache.cache_get("test:tiered") == {"v": 1}
+    cache.handle_invalidation_message(json.dumps({"worker": "other", "keys": ["test:tiered"]}))
+    assert cache.cache_get("test:tiered") == {"v": 2}
+    
+    # Writes through this worker keep both tiers in step
+    assert cache.cache_increment("test:tiered-counter") == 1
+    assert cache.cache_get("test:tiered-counter") == 1
+    assert cache.cache_increment("test:tiered-counter") == 2
+    assert cache.cache_get("test:tiered-counter") == 2
+    assert cache.cache_delete("test:tiered")
+    assert cache.cache_get("test:tiered") is None
+    
+    stats = cache.get_cache_stats()
+    assert stats["local_enabled"] is True
+    assert stats["local"]["hits"] >= 2
+
+def test_get_or_compute_single_flight():
+    calls = []
+    
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": 42}
+    
+    # Concurrent misses on the same key run the computation once
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: cache.get_or_compute("test:flight", compute, expire=60), range(8)))
+    assert results == [{"value": 42}] * 8
+    assert len(calls) == 1
+    
+    # Later reads are served from cache
+    assert cache.get_or_compute("test:flight", compute, expire=60) == {"value": 42}
+    assert len(calls) == 1
+
+def test_async_get_or_compute_single_flight():
+    calls = []
+    
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return {"value": 42}
+    
+    async def main():
+        # Concurrent misses on the same key run the computation once
+        results = await asyncio.gather(*(cache.async_get_or_compute("test:async-flight", compute, expire=60)
+                                         for _ in range(4)))
+        assert results == [{"value": 42}] * 4
+        assert cache.async_single_flight.in_flight() == 0
+        # Later reads are served from cache, and the sync client sees the same key
+        assert await cache.async_get_or_compute("test:async-flight", compute, expire=60) == {"value": 42}
+    
+    asyncio.run(main())
+    assert len(calls) == 1
+    assert cache.cache_get("test:async-flight") == {"value": 42}
+
+def test_get_or_compute_waits_for_lock_holder():
+    # Another process holds the recompute lock and fills the key shortly after
+    tokens = cache.acquire_locks(["test:locked"])
+    assert tokens
+    assert cache.acquire_locks(["test:locked"]) == {}
+    
+    def fill():
+        time.sleep(0.1)
+        cache.cache_set("test:locked", {"from": "holder"})
+        cache.release_locks(tokens)
+    
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(fill)
+        assert cache.get_or_compute("test:locked", lambda: {"from": "waiter"}) == {"from": "holder"}
+
+def test_xfetch_early_refresh(monkeypatch):
+    # No expiry or no recorded compute time never refreshes early
+    assert not cache._should_refresh_early(-1, "0.5", 1.0)
+    assert not cache._should_refresh_early(1000, None, 1.0)
+    
+    # The closer to expiry and the slower the computation, the likelier a refresh
+    monkeypatch.setattr(cache.random, "random", lambda: 0.5)
+    assert cache._should_refresh_early(100, "0.5", 1.0)
+    assert not cache._should_refresh_early(60000, "0.5", 1.0)
+    
+    # A key due for early refresh is recomputed while its TTL is still running
+    cache.get_or_compute("test:xfetch", lambda: "old", expire=60)
+    monkeypatch.setattr(cache, "_should_refresh_early", lambda *args: True)
+    assert cache.get_or_compute("test:xfetch", lambda: "new", expire=60) == "new"
+    assert cache.cache_get("test:xfetch") == "new"
+
+def test_circuit_breaker_states():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+    assert breaker.state == CircuitBreaker.CLOSED
+    
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    
+    # After the recovery timeout exactly one probe is let through
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    
+    # A failed probe re-opens the circuit, a successful one closes it
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_cancelled_probe_releases_half_open_circuit(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+    monkeypatch.setattr(cache, "redis_breaker", breaker)
+    breaker.record_failure()
+    time.sleep(0.06)
+    
+    # The probe is cancelled before Redis answers; the circuit stays half-open for the next one
+    with pytest.raises(asyncio.CancelledError):
+        with cache.redis_call():
+            raise asyncio.CancelledError()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+def test_cache_bypasses_redis_when_circuit_open(monkeypatch):
+    calls = []
+    
+    class DownRedis:
+        def get(self, key):
+            calls.append(key)
+            raise RedisConnectionError("Connection refused")
+    
+    monkeypatch.setattr(cache, "redis_client", DownRedis())
+    monkeypatch.setattr(cache, "redis_breaker", CircuitBreaker(failure_threshold=3, recovery_timeout=60))
+    
+    # Failures are absorbed, and after the threshold Redis is no longer called
+    for _ in range(10):
+        assert cache.cache_get("test:down") is None
+    assert len(calls) == 3
+    assert cache.get_redis_breaker_state()["state"] == CircuitBreaker.OPEN
+    
+    is_healthy, message = cache.check_redis_connection()
+    assert is_healthy is False
+    assert "circuit" in message
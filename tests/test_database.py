@@ -1,8 +1,14 @@
 import pytest
 from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.orm import sessionmaker, Session
-from app.database import Base, get_db, engine, SessionLocal
-from app.models import User, Exercise
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Base, get_db, engine, SessionLocal, get_async_db, to_async_database_url
+from app.models import User, Exercise, Favorite
+from app import migrations, index_benchmark, importer, rating_stats
+from sqlalchemy.exc import IntegrityError
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+import json
 import uuid
 
 @pytest.fixture(autouse=True)
@@ -146,4 +152,128 @@ def test_cascade_delete():
         assert deleted_exercise is None
     finally:
         db.rollback()
-        db.close() 
\ No newline at end of file
+        db.close() 
+
+def test_async_database_url():
+    """Test mapping sync database URLs to async drivers"""
+    assert to_async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert to_async_database_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert to_async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+async def test_get_async_db():
+    """Test the get_async_db dependency"""
+    async for db in get_async_db():
+        assert isinstance(db, AsyncSession)
+        result = await db.execute(text("SELECT 1"))
+        assert result.scalar() == 1
+
+def test_startup_migrations(tmp_path):
+    """Test migrate/verify startup modes on a fresh database"""
+    migrate_engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    
+    with pytest.raises(RuntimeError):
+        migrations.init_schema(migrate_engine, "verify")
+    
+    migrations.init_schema(migrate_engine, "migrate")
+    migrations.init_schema(migrate_engine, "verify")
+    # Already at head: nothing to do
+    migrations.init_schema(migrate_engine, "migrate")
+    
+    tables = inspect(migrate_engine).get_table_names()
+    assert {"users", "exercises", "favorites", "saves", "ratings", "alembic_version"} <= set(tables)
+    
+    # Migrations produce the schema the models describe
+    with migrate_engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"include_name": include_fts_name})
+        assert compare_metadata(context, Base.metadata) == []
+    
+    with pytest.raises(ValueError):
+        migrations.init_schema(migrate_engine, "sometimes")
+
+def test_startup_migrations_adopt_unversioned_schema(tmp_path):
+    """Test that a schema created by create_all before migrations is stamped and upgraded"""
+    legacy_engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=legacy_engine)
+    
+    migrations.init_schema(legacy_engine, "migrate")
+    with legacy_engine.connect() as connection:
+        assert migrations.get_current_revision(connection) == migrations.get_head_revision()
+
+def include_fts_name(name, type_, parent_names):
+    return not (type_ == "table" and (name or "").startswith("exercises_fts"))
+
+def test_interaction_pairs_are_unique():
+    """Test that a user can favorite an exercise only once"""
+    db = next(get_db())
+    try:
+        user = User(username=f"pairuser_{uuid.uuid4().hex[:8]}", hashed_password="-")
+        exercise = Exercise(name="Pair", description="Pair", difficulty_level=1, creator=user)
+        db.add_all([user, exercise])
+        db.commit()
+        db.add_all([Favorite(user_id=user.id, exercise_id=exercise.id) for _ in range(2)])
+        with pytest.raises(IntegrityError):
+            db.commit()
+        db.rollback()
+    finally:
+        db.close()
+
+def test_index_benchmark_uses_indexes():
+    """Test that the index benchmark runs and every query is served by an index"""
+    results = index_benchmark.benchmark(200, repeats=1)
+    assert {result["query"] for result in results} == set(index_benchmark.QUERIES)
+    assert all("USING" in result["plan"] and "SCAN" not in result["plan"] for result in results)
+
+def test_importer_loads_dumps_and_rebuilds_counts(tmp_path):
+    """Test a batched import of exercises (NDJSON), favorites (CSV) and ratings followed by the count rebuild"""
+    import_engine = create_engine(f"sqlite:///{tmp_path}/import.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(import_engine)
+    user_id = str(uuid.uuid4())
+    with import_engine.begin() as connection:
+        connection.execute(User.__table__.insert(), [{"id": user_id, "username": "importer", "hashed_password": "-"}])
+    
+    exercise_ids = [str(uuid.uuid4()) for _ in range(5)]
+    dump = tmp_path / "exercises.ndjson"
+    dump.write_text("".join(
+        json.dumps({"id": exercise_id, "name": f"Imported {i}", "description": "", "difficulty_level": 2,
+                    "is_public": True, "creator_id": user_id, "created_at": "2026-01-02T03:04:05"}) + "\n"
+        for i, exercise_id in enumerate(exercise_ids)
+    ))
+    importer.main(["exercises", str(dump), "--batch-size", "2", "--workers", "2", "--skip-rebuild"],
+                  engine=import_engine)
+    
+    favorites = tmp_path / "favorites.csv"
+    favorites.write_text("user_id,exercise_id\n" + "".join(f"{user_id},{exercise_id}\n" for exercise_id in exercise_ids[:3]))
+    with favorites.open(newline="") as stream:
+        stats = importer.import_records(import_engine, "favorites", importer.read_records(stream, "csv"), batch_size=2)
+    assert (stats["rows"], stats["batches"]) == (3, 2)
+    importer.rebuild_counters(import_engine)
+    
+    with import_engine.connect() as connection:
+        counts = dict(connection.execute(text("SELECT id, favorite_count FROM exercises")).all())
+        # Missing keys got the model defaults
+        assert connection.execute(text("SELECT COUNT(*) FROM favorites WHERE created_at IS NULL")).scalar() == 0
+    assert counts == {exercise_id: int(i < 3) for i, exercise_id in enumerate(exercise_ids)}
+    
+    # Ratings load without the per-row triggers, which are back on with the aggregates rebuilt
+    ratings = [{"user_id": user_id, "exercise_id": exercise_ids[0], "value": 4}]
+    importer.import_records(import_engine, "ratings", iter(ratings))
+    with import_engine.connect() as connection:
+        triggers = connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars().all()
+        assert connection.execute(text("SELECT rating_avg FROM exercises WHERE id = :id"),
+                                  {"id": exercise_ids[0]}).scalar() == 4.0
+    assert set(rating_stats.SQLITE_RATING_TRIGGERS) <= set(triggers)
+    
+    # A failed ratings import still rebuilds the aggregates for the batches it committed
+    ratings = [{"user_id": user_id, "exercise_id": exercise_ids[1], "value": 2}, {"user_id": user_id, "rating": 5}]
+    with pytest.raises(ValueError, match="no column rating"):
+        importer.import_records(import_engine, "ratings", iter(ratings), batch_size=1)
+    with import_engine.connect() as connection:
+        triggers = connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars().all()
+        assert connection.execute(text("SELECT rating_avg FROM exercises WHERE id = :id"),
+                                  {"id": exercise_ids[1]}).scalar() == 2.0
+    assert set(rating_stats.SQLITE_RATING_TRIGGERS) <= set(triggers)
+    
+    with pytest.raises(ValueError, match="no column rating"):
+        importer.import_records(import_engine, "favorites", iter([{"user_id": user_id, "rating": 5}]))
+    import_engine.dispose()
+
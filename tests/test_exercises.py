@@ -1,8 +1,18 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
-from app import models, auth
+from app import models, auth, cache, trending
+from app.circuit_breaker import CircuitBreaker
+from app.helpers import exercise_helpers
+from app.helpers.pagination import DEFAULT_PAGE_SIZE, _keyset_filter
+from datetime import datetime, timedelta, timezone
+import csv
+import io
+import json
 import uuid
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
 
 @pytest.fixture(autouse=True)
 def cleanup_db(test_db):
@@ -487,4 +497,577 @@ def test_update_rating(client, test_db, test_user, auth_headers):
     assert response.status_code == 200
     ratings = response.json()
     assert len(ratings) == 1
-    assert ratings[0]["value"] == 5 
\ No newline at end of file
+    assert ratings[0]["value"] == 5 
+
+def test_read_exercises_cursor_pagination(client, test_db, test_user, auth_headers):
+    # Create exercises spread across difficulty levels
+    for i in range(5):
+        exercise = {"name": f"Paged {i}", "description": "Paged", "difficulty_level": 5 - i, "is_public": True}
+        response = client.post("/exercises/", json=exercise, headers=auth_headers)
+        assert response.status_code == 200
+    
+    # Walk all pages sorted by difficulty
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "sort_by_difficulty": "true"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/exercises/page", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["exercises"]) <= 2
+        seen.extend(data["exercises"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    
+    assert [ex["difficulty_level"] for ex in seen] == [1, 2, 3, 4, 5]
+    
+    # The cursor is also in the header every paginated endpoint uses
+    response = client.get("/exercises/page", params={"limit": 2})
+    assert response.headers["X-Next-Cursor"] == response.json()["next_cursor"]
+    assert len({ex["id"] for ex in seen}) == 5
+    
+    # A cursor issued for one sort order is rejected for another
+    response = client.get("/exercises/page", params={"limit": 2, "sort_by_difficulty": "true"})
+    response = client.get("/exercises/page", params={"cursor": response.json()["next_cursor"]})
+    assert response.status_code == 400
+    
+    response = client.get("/exercises/page", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_list_exercises_interaction_status(auth_headers, auth_headers2):
+    """Test that list endpoints resolve counts and per-user status in bulk"""
+    created = []
+    for i in range(3):
+        exercise = {"name": f"Bulk Status {i}", "description": "Bulk", "difficulty_level": 1, "is_public": True}
+        created.append(client.post("/exercises/", json=exercise, headers=auth_headers).json())
+    
+    client.post(f"/exercises/{created[0]['id']}/favorite", headers=auth_headers)
+    client.post(f"/exercises/{created[0]['id']}/favorite", headers=auth_headers2)
+    client.post(f"/exercises/{created[1]['id']}/save", headers=auth_headers2)
+    
+    response = client.get("/exercises/", headers=auth_headers)
+    assert response.status_code == 200
+    by_id = {ex["id"]: ex for ex in response.json()}
+    
+    assert by_id[created[0]["id"]]["favorite_count"] == 2
+    assert by_id[created[0]["id"]]["is_favorited"] is True
+    assert by_id[created[1]["id"]]["save_count"] == 1
+    assert by_id[created[1]["id"]]["is_saved"] is False
+    assert by_id[created[2]["id"]]["favorite_count"] == 0
+    assert by_id[created[2]["id"]]["is_favorited"] is False
+
+def test_search_exercises(client, test_db, test_user, auth_headers):
+    exercises = [
+        {"name": "Push-up", "description": "Upper body press", "difficulty_level": 2, "is_public": True},
+        {"name": "Squat", "description": "Push through the heels", "difficulty_level": 2, "is_public": True},
+        {"name": "Plank", "description": "Core hold", "difficulty_level": 1, "is_public": True}
+    ]
+    created = []
+    for exercise in exercises:
+        response = client.post("/exercises/", json=exercise, headers=auth_headers)
+        assert response.status_code == 200
+        created.append(response.json())
+    
+    # Terms match name or description, the last term as a prefix
+    response = client.get("/exercises/?q=push")
+    assert response.status_code == 200
+    assert {ex["name"] for ex in response.json()} == {"Push-up", "Squat"}
+    
+    response = client.get("/exercises/?q=core ho")
+    assert [ex["name"] for ex in response.json()] == ["Plank"]
+    
+    # The index follows updates and deletes
+    client.put(f"/exercises/{created[2]['id']}", json={"description": "Push the floor away"}, headers=auth_headers)
+    response = client.get("/exercises/?q=push")
+    assert len(response.json()) == 3
+    
+    client.delete(f"/exercises/{created[0]['id']}", headers=auth_headers)
+    response = client.get("/exercises/page", params={"q": "push"})
+    assert {ex["name"] for ex in response.json()["exercises"]} == {"Squat", "Plank"}
+    
+    # Punctuation-only queries do not restrict results
+    response = client.get("/exercises/?q=%22%2A")
+    assert response.status_code == 200
+
+def test_read_exercise_uses_cache(auth_headers, auth_headers2, db):
+    """Test that exercise detail reads go through the exercise cache"""
+    exercise = {"name": "Cached Exercise", "description": "Cached", "difficulty_level": 2, "is_public": True}
+    created = client.post("/exercises/", json=exercise, headers=auth_headers).json()
+    
+    # First read populates the cache with the row, counters included, but no per-user fields
+    response = client.get(f"/exercises/{created['id']}", headers=auth_headers)
+    assert response.status_code == 200
+    payload = cache.get_cached_exercise(created["id"])
+    assert payload["name"] == "Cached Exercise"
+    assert payload["favorite_count"] == 0
+    assert "is_favorited" not in payload
+    
+    # A change made behind the cache's back is not seen until invalidation
+    db_exercise = db.query(models.Exercise).filter(models.Exercise.id == created["id"]).first()
+    db_exercise.name = "Changed Directly"
+    db.commit()
+    assert client.get(f"/exercises/{created['id']}").json()["name"] == "Cached Exercise"
+    
+    # Interactions invalidate the payload; per-user status is applied on top of it
+    client.post(f"/exercises/{created['id']}/favorite", headers=auth_headers2)
+    assert client.get(f"/exercises/{created['id']}", headers=auth_headers2).json()["is_favorited"] is True
+    data = client.get(f"/exercises/{created['id']}", headers=auth_headers).json()
+    assert data["is_favorited"] is False
+    assert data["favorite_count"] == 1
+    
+    # Updates invalidate the cached payload
+    client.put(f"/exercises/{created['id']}", json={"difficulty_level": 4}, headers=auth_headers)
+    data = client.get(f"/exercises/{created['id']}").json()
+    assert data["name"] == "Changed Directly"
+    assert data["difficulty_level"] == 4
+    
+    # Private exercises are still access-checked on a cache hit
+    client.put(f"/exercises/{created['id']}", json={"is_public": False}, headers=auth_headers)
+    assert client.get(f"/exercises/{created['id']}", headers=auth_headers).status_code == 200
+    assert client.get(f"/exercises/{created['id']}", headers=auth_headers2).status_code == 403
+
+def test_rate_exercise_upserts_one_row(client, test_db, test_user, auth_headers):
+    response = client.post("/exercises/", json={"name": "Rated", "description": "Rated", "difficulty_level": 2, "is_public": True},
+                           headers=auth_headers)
+    exercise_id = response.json()["id"]
+    
+    first = client.post(f"/exercises/{exercise_id}/rate", json={"value": 2}, headers=auth_headers)
+    second = client.post(f"/exercises/{exercise_id}/rate", json={"value": 4}, headers=auth_headers)
+    assert first.status_code == second.status_code == 200
+    assert second.json()["id"] == first.json()["id"]
+    assert second.json()["value"] == 4
+    assert test_db.query(models.Rating).filter(models.Rating.exercise_id == exercise_id).count() == 1
+    
+    # The unique index rejects a second row for the same user and exercise
+    test_db.add(models.Rating(user_id=test_user["user"].id, exercise_id=exercise_id, value=1))
+    with pytest.raises(IntegrityError):
+        test_db.commit()
+    test_db.rollback()
+    
+    response = client.post(f"/exercises/{uuid.uuid4()}/rate", json={"value": 3}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Exercise not found"
+
+def test_rating_aggregates(auth_headers, auth_headers2, db):
+    response = client.post("/exercises/", json={"name": "Aggregated", "description": "Aggregated",
+                                                "difficulty_level": 2, "is_public": True}, headers=auth_headers)
+    exercise_id = response.json()["id"]
+    
+    client.post(f"/exercises/{exercise_id}/rate", json={"value": 2}, headers=auth_headers)
+    client.post(f"/exercises/{exercise_id}/rate", json={"value": 5}, headers=auth_headers)
+    client.post(f"/exercises/{exercise_id}/rate", json={"value": 3}, headers=auth_headers2)
+    
+    exercise = client.get(f"/exercises/{exercise_id}", headers=auth_headers).json()
+    assert exercise["avg_rating"] == 4.0
+    assert exercise["rating_count"] == 2
+    assert exercise["user_rating"] == 5
+    listed = next(ex for ex in client.get("/exercises/", headers=auth_headers2).json() if ex["id"] == exercise_id)
+    assert listed["avg_rating"] == 4.0
+    assert listed["user_rating"] == 3
+    
+    summary = client.get(f"/exercises/{exercise_id}/ratings/summary").json()
+    assert summary["rating_count"] == 2
+    assert summary["histogram"] == {"1": 0, "2": 0, "3": 1, "4": 0, "5": 1}
+    
+    # The triggers also see rows deleted outside the rating endpoints
+    db.query(models.Rating).filter(models.Rating.value == 5).delete()
+    db.commit()
+    summary = client.get(f"/exercises/{exercise_id}/ratings/summary").json()
+    assert summary["rating_count"] == 1
+    assert summary["avg_rating"] == 3.0
+
+def test_cached_exercise_carries_rating_aggregates(auth_headers, auth_headers2, db):
+    cache.redis_client.flushdb()
+    response = client.post("/exercises/", json={"name": "Cached ratings", "description": "Cached ratings",
+                                                "difficulty_level": 2, "is_public": True}, headers=auth_headers)
+    exercise_id = response.json()["id"]
+    client.post(f"/exercises/{exercise_id}/rate", json={"value": 2}, headers=auth_headers)
+    assert client.get(f"/exercises/{exercise_id}").json()["avg_rating"] == 2.0
+    
+    # Rating invalidates the cached payload, which then holds the new aggregates
+    client.post(f"/exercises/{exercise_id}/rate", json={"value": 4}, headers=auth_headers2)
+    assert client.get(f"/exercises/{exercise_id}").json()["avg_rating"] == 3.0
+    payload = cache.get_cached_exercise(exercise_id)
+    assert (payload["avg_rating"], payload["rating_count"]) == (3.0, 2)
+    assert "user_rating" not in payload
+    
+    # An anonymous cache hit runs no query; a user's read only looks up their own rating
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        data = client.get(f"/exercises/{exercise_id}").json()
+        assert statements == []
+        assert (data["avg_rating"], data["user_rating"]) == (3.0, None)
+        data = client.get(f"/exercises/{exercise_id}", headers=auth_headers2).json()
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    assert data["user_rating"] == 4
+    assert not any("exercise_rating_stats" in statement for statement in statements)
+
+def test_ratings_and_interactions_paginated_and_streamed(auth_headers, auth_headers2, db):
+    response = client.post("/exercises/", json={"name": "Popular", "description": "Popular",
+                                                "difficulty_level": 1, "is_public": True}, headers=auth_headers)
+    exercise_id = response.json()["id"]
+    for headers in (auth_headers, auth_headers2):
+        client.post(f"/exercises/{exercise_id}/rate", json={"value": 4}, headers=headers)
+        client.post(f"/exercises/{exercise_id}/save", headers=headers)
+    
+    response = client.get(f"/exercises/{exercise_id}/ratings", headers=auth_headers)
+    assert len(response.json()) == 2 and "X-Next-Cursor" not in response.headers
+    
+    response = client.get(f"/exercises/{exercise_id}/ratings", params={"limit": 1}, headers=auth_headers)
+    first_page = response.json()
+    response = client.get(f"/exercises/{exercise_id}/ratings",
+                          params={"limit": 1, "cursor": response.headers["X-Next-Cursor"]}, headers=auth_headers)
+    assert len(first_page) == len(response.json()) == 1
+    assert first_page[0]["id"] != response.json()[0]["id"]
+    assert "X-Next-Cursor" not in response.headers
+    
+    response = client.get(f"/exercises/{exercise_id}/interactions",
+                          params={"interaction_type": "saves", "stream": True}, headers=auth_headers)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert len(response.text.splitlines()) == 2
+    
+    response = client.get(f"/exercises/{exercise_id}/ratings",
+                          params={"stream": True, "cursor": "garbage"}, headers=auth_headers)
+    assert response.status_code == 400
+    
+    # Without limit a long list still comes back a default-size page at a time; stream=true gets all of it
+    db.execute(models.Rating.__table__.insert(), [
+        {"id": str(uuid.uuid4()), "user_id": str(uuid.uuid4()), "exercise_id": exercise_id, "value": 3}
+        for _ in range(DEFAULT_PAGE_SIZE)
+    ])
+    db.commit()
+    response = client.get(f"/exercises/{exercise_id}/ratings", headers=auth_headers)
+    assert len(response.json()) == DEFAULT_PAGE_SIZE and "X-Next-Cursor" in response.headers
+    response = client.get(f"/exercises/{exercise_id}/ratings", params={"stream": True}, headers=auth_headers)
+    assert len(response.text.splitlines()) == DEFAULT_PAGE_SIZE + 2
+
+def test_interaction_counters_are_stored_on_exercise(auth_headers, auth_headers2, db):
+    response = client.post("/exercises/", json={"name": "Counted", "description": "Counted",
+                                                "difficulty_level": 1, "is_public": True}, headers=auth_headers)
+    exercise_id = response.json()["id"]
+    
+    client.post(f"/exercises/{exercise_id}/favorite", headers=auth_headers)
+    client.post(f"/exercises/{exercise_id}/favorite", headers=auth_headers)  # repeat is a no-op
+    client.post(f"/exercises/{exercise_id}/favorite", headers=auth_headers2)
+    client.post(f"/exercises/{exercise_id}/save", headers=auth_headers2)
+    client.delete(f"/exercises/{exercise_id}/save", headers=auth_headers)  # never saved
+    
+    db_exercise = db.query(models.Exercise).filter(models.Exercise.id == exercise_id).first()
+    assert (db_exercise.favorite_count, db_exercise.save_count) == (2, 1)
+    
+    # Counts survive losing Redis
+    cache.redis_client.flushdb()
+    data = client.get(f"/exercises/{exercise_id}").json()
+    assert (data["favorite_count"], data["save_count"]) == (2, 1)
+
+def test_favorite_racing_another_request_is_a_no_op(auth_headers, db):
+    response = client.post("/exercises/", json={"name": "Raced", "description": "Raced",
+                                                "difficulty_level": 1, "is_public": True}, headers=auth_headers)
+    exercise_id, user_id = response.json()["id"], response.json()["creator_id"]
+    
+    # Another request for the same user commits the favorite first
+    db.add(models.Favorite(user_id=user_id, exercise_id=exercise_id))
+    db.query(models.Exercise).filter(models.Exercise.id == exercise_id).update({"favorite_count": 1})
+    db.commit()
+    
+    response = client.post(f"/exercises/{exercise_id}/favorite", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["is_favorited"] is True
+    assert response.json()["favorite_count"] == 1
+    
+    client.delete(f"/exercises/{exercise_id}/favorite", headers=auth_headers)
+    response = client.delete(f"/exercises/{exercise_id}/favorite", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["favorite_count"] == 0
+
+def test_interactions_leave_updated_at_alone(auth_headers, db):
+    response = client.post("/exercises/", json={"name": "Untouched", "description": "Untouched",
+                                                "difficulty_level": 1, "is_public": True}, headers=auth_headers)
+    exercise_id = response.json()["id"]
+    
+    client.post(f"/exercises/{exercise_id}/favorite", headers=auth_headers)
+    client.post(f"/exercises/{exercise_id}/save", headers=auth_headers)
+    client.delete(f"/exercises/{exercise_id}/save", headers=auth_headers)
+    
+    row = db.query(models.Exercise.favorite_count, models.Exercise.updated_at).filter(
+        models.Exercise.id == exercise_id).one()
+    assert row.favorite_count == 1
+    assert row.updated_at is None
+
+def test_sort_exercises_with_cursor(auth_headers, auth_headers2, db):
+    ids = []
+    for i in range(4):
+        response = client.post("/exercises/", json={"name": f"Sorted {i}", "description": "Sorted",
+                                                    "difficulty_level": 1, "is_public": True}, headers=auth_headers)
+        ids.append(response.json()["id"])
+    for exercise_id, value in zip(ids, (2, 5, 3)):
+        client.post(f"/exercises/{exercise_id}/rate", json={"value": value}, headers=auth_headers2)
+    client.post(f"/exercises/{ids[2]}/favorite", headers=auth_headers)
+    client.post(f"/exercises/{ids[2]}/favorite", headers=auth_headers2)
+    client.post(f"/exercises/{ids[0]}/favorite", headers=auth_headers)
+    
+    def walk(sort):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 1, "sort": sort, **({"cursor": cursor} if cursor else {})}
+            data = client.get("/exercises/page", params=params).json()
+            seen.extend(ex["id"] for ex in data["exercises"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                return seen
+    
+    assert walk("-rating") == [ids[1], ids[2], ids[0], ids[3]]
+    assert walk("-favorite_count")[:2] == [ids[2], ids[0]]
+    # Rows created within the same second are still paged through exactly once
+    assert sorted(walk("-created_at")) == sorted(ids)
+    listed = client.get("/exercises/", params={"sort": "rating"}).json()
+    assert [ex["id"] for ex in listed] == [ids[3], ids[0], ids[2], ids[1]]
+    
+    # Only SQLite compares timestamps as text; elsewhere the cursor binds a real datetime
+    columns = (models.Exercise.created_at, models.Exercise.id)
+    condition = _keyset_filter(columns, ["2026-10-17 13:00:00", "x"], "postgresql", False)
+    assert condition.compile().params["param_1"] == datetime(2026, 10, 17, 13, 0)
+    
+    assert client.get("/exercises/page", params={"sort": "name"}).status_code == 400
+    assert client.get("/exercises/", params={"sort": "-"}).status_code == 400
+    
+    # Descending deep pages walk the index backwards instead of sorting
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM exercises WHERE (rating_avg, id) < (3.0, 'x') "
+        "ORDER BY rating_avg DESC, id DESC LIMIT 20"
+    )).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "idx_exercise_rating_keyset" in details
+    assert "TEMP B-TREE" not in details
+
+def test_created_at_cursor_with_whole_second_timestamps(auth_headers, db):
+    ids = [client.post("/exercises/", json={"name": f"Imported {i}", "description": "Imported",
+                                            "difficulty_level": 1, "is_public": True}, headers=auth_headers).json()["id"]
+           for i in range(6)]
+    # Bound datetimes are stored with .000000 (as after an import); the rest keep CURRENT_TIMESTAMP's form
+    stamps = [datetime(2026, 1, 1, 10, 0, 0), datetime(2026, 1, 1, 10, 0, 0), datetime(2026, 1, 1, 10, 0, 1),
+              datetime(2026, 1, 1, 10, 0, 1, 500)]
+    for exercise_id, stamp in zip(ids, stamps):
+        db.query(models.Exercise).filter(models.Exercise.id == exercise_id).update({"created_at": stamp})
+    db.execute(text("UPDATE exercises SET created_at = '2026-01-01 10:00:01' WHERE id = :id"), {"id": ids[4]})
+    db.commit()
+    # Rows come in the order of their stored text, so the short form sorts ahead of the equal long one
+    stored = [stamp.strftime("%Y-%m-%d %H:%M:%S.%f") for stamp in stamps] + ["2026-01-01 10:00:01"]
+    expected = sorted(zip(stored, ids))
+    
+    def walk(sort):
+        seen, cursor = [], None
+        for _ in range(len(ids) + 1):
+            params = {"limit": 1, "sort": sort, **({"cursor": cursor} if cursor else {})}
+            data = client.get("/exercises/page", params=params).json()
+            seen.extend(ex["id"] for ex in data["exercises"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        return seen
+    
+    ascending = walk("created_at")
+    assert ascending[:5] == [exercise_id for _, exercise_id in expected]
+    assert sorted(ascending) == sorted(ids)
+    descending = walk("-created_at")
+    assert descending[1:] == [exercise_id for _, exercise_id in reversed(expected)]
+    assert sorted(descending) == sorted(ids)
+
+def test_trending_exercises(auth_headers, auth_headers2, monkeypatch):
+    cache.redis_client.flushdb()
+    ids = []
+    for i, is_public in enumerate((True, True, True, False)):
+        response = client.post("/exercises/", json={"name": f"Trending {i}", "description": "Trending",
+                                                    "difficulty_level": 1, "is_public": is_public}, headers=auth_headers)
+        ids.append(response.json()["id"])
+    for headers in (auth_headers, auth_headers2):
+        client.post(f"/exercises/{ids[1]}/favorite", headers=headers)
+    client.post(f"/exercises/{ids[0]}/save", headers=auth_headers2)
+    client.post(f"/exercises/{ids[2]}/rate", json={"value": 4}, headers=auth_headers2)
+    client.post(f"/exercises/{ids[3]}/favorite", headers=auth_headers)
+    # A removed favorite no longer counts
+    client.post(f"/exercises/{ids[2]}/favorite", headers=auth_headers)
+    client.delete(f"/exercises/{ids[2]}/favorite", headers=auth_headers)
+    
+    # The private exercise is only listed for its creator
+    response = client.get("/exercises/trending", params={"window": "7d"}, headers=auth_headers2)
+    assert [ex["id"] for ex in response.json()] == [ids[1], ids[0], ids[2]]
+    response = client.get("/exercises/trending", params={"limit": 2}, headers=auth_headers)
+    assert [ex["id"] for ex in response.json()] == [ids[1], ids[3]]
+    # Hidden exercises do not shorten the list, even when they fill a whole page of ranked ids
+    monkeypatch.setattr(exercise_helpers, "TRENDING_OVERFETCH", 1)
+    response = client.get("/exercises/trending", params={"limit": 2}, headers=auth_headers2)
+    assert [ex["id"] for ex in response.json()] == [ids[1], ids[0]]
+    assert client.get("/exercises/trending", params={"window": "1y"}).status_code == 400
+    
+    # Without Redis the ranking comes from the interaction tables
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+    monkeypatch.setattr(cache, "redis_breaker", breaker)
+    response = client.get("/exercises/trending", params={"window": "1d"})
+    assert [ex["id"] for ex in response.json()] == [ids[1], ids[0], ids[2]]
+
+def test_rerating_does_not_add_trending_score(auth_headers, db):
+    cache.redis_client.flushdb()
+    response = client.post("/exercises/", json={"name": "Rerated", "description": "Rerated",
+                                                "difficulty_level": 1, "is_public": True}, headers=auth_headers)
+    exercise_id = response.json()["id"]
+    bucket = trending._bucket_key(trending._bucket())
+    
+    client.post(f"/exercises/{exercise_id}/rate", json={"value": 2}, headers=auth_headers)
+    assert cache.redis_client.zscore(bucket, exercise_id) == trending.INTERACTION_WEIGHTS["ratings"]
+    response = client.post(f"/exercises/{exercise_id}/rate", json={"value": 5}, headers=auth_headers)
+    assert response.json()["value"] == 5
+    assert cache.redis_client.zscore(bucket, exercise_id) == trending.INTERACTION_WEIGHTS["ratings"]
+    
+    # Nor does it in the database fallback: an old rating changed today is not counted
+    db.query(models.Rating).filter(models.Rating.exercise_id == exercise_id).update(
+        {"created_at": datetime.utcnow() - timedelta(days=30)})
+    db.commit()
+    client.post(f"/exercises/{exercise_id}/rate", json={"value": 3}, headers=auth_headers)
+    assert exercise_id not in dict(trending.get_trending_ids_from_db(db, "1d", 10))
+
+def test_unfavorite_takes_trending_weight_from_the_hour_it_was_added(auth_headers, db):
+    cache.redis_client.flushdb()
+    response = client.post("/exercises/", json={"name": "Unfavorited", "description": "Unfavorited",
+                                                "difficulty_level": 1, "is_public": True}, headers=auth_headers)
+    exercise_id = response.json()["id"]
+    client.post(f"/exercises/{exercise_id}/favorite", headers=auth_headers)
+    client.post(f"/exercises/{exercise_id}/save", headers=auth_headers)
+    
+    # Pretend both were added earlier: three hours ago and before the longest window
+    three_hours_ago = datetime.utcnow() - timedelta(hours=3)
+    db.query(models.Favorite).filter(models.Favorite.exercise_id == exercise_id).update({"created_at": three_hours_ago})
+    db.query(models.Save).filter(models.Save.exercise_id == exercise_id).update(
+        {"created_at": datetime.utcnow() - timedelta(days=40)})
+    db.commit()
+    old_bucket = trending._bucket_key(trending._bucket(three_hours_ago.replace(tzinfo=timezone.utc).timestamp()))
+    cache.redis_client.zincrby(old_bucket, trending.INTERACTION_WEIGHTS["favorites"], exercise_id)
+    current_bucket = trending._bucket_key(trending._bucket())
+    keys = set(cache.redis_client.keys(f"{trending.TRENDING_PREFIX}bucket:*"))
+    
+    client.delete(f"/exercises/{exercise_id}/favorite", headers=auth_headers)
+    client.delete(f"/exercises/{exercise_id}/save", headers=auth_headers)
+    assert cache.redis_client.zscore(old_bucket, exercise_id) == 0
+    assert cache.redis_client.zscore(current_bucket, exercise_id) == (
+        trending.INTERACTION_WEIGHTS["favorites"] + trending.INTERACTION_WEIGHTS["saves"])
+    assert set(cache.redis_client.keys(f"{trending.TRENDING_PREFIX}bucket:*")) == keys
+
+def test_read_exercises_batch(auth_headers, auth_headers2, db):
+    cache.redis_client.flushdb()
+    ids = []
+    for i, is_public in enumerate((True, False, True)):
+        response = client.post("/exercises/", json={"name": f"Batch {i}", "description": "Batch",
+                                                    "difficulty_level": 1, "is_public": is_public}, headers=auth_headers)
+        ids.append(response.json()["id"])
+    client.post(f"/exercises/{ids[2]}/favorite", headers=auth_headers2)
+    requested = ",".join([ids[2], ids[1], str(uuid.uuid4()), ids[0], ids[2]])
+    
+    # Request order, duplicates once, and the other user's private exercise left out
+    data = client.get("/exercises/batch", params={"ids": requested}, headers=auth_headers2).json()
+    assert [ex["id"] for ex in data] == [ids[2], ids[0]]
+    assert data[0]["is_favorited"] is True
+    
+    # The first call cached every exercise it found, so this one does not read the exercises table
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        data = client.get("/exercises/batch", params={"ids": ",".join(ids)}, headers=auth_headers).json()
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    assert [ex["id"] for ex in data] == ids
+    assert not any("FROM exercises" in statement for statement in statements)
+    
+    too_many = ",".join(str(uuid.uuid4()) for _ in range(101))
+    assert client.get("/exercises/batch", params={"ids": too_many}).status_code == 400
+    assert client.get("/exercises/batch", params={"ids": "not-a-uuid"}).status_code == 400
+
+def test_bulk_create_update_delete(auth_headers, auth_headers2, db):
+    items = [{"name": f"Bulk {i}", "description": "Bulk", "difficulty_level": 2} for i in range(3)]
+    items.insert(1, {"name": "Invalid", "difficulty_level": 9})
+    response = client.post("/exercises/bulk", json=items, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (3, 1)
+    assert [result["status"] for result in data["results"]] == ["created", "error", "created", "created"]
+    ids = [result["id"] for result in data["results"] if result["status"] == "created"]
+    assert db.query(models.Exercise).filter(models.Exercise.id.in_(ids)).count() == 3
+    
+    other = client.post("/exercises/", json={"name": "Private", "description": "Private", "difficulty_level": 1,
+                                              "is_public": False}, headers=auth_headers2).json()["id"]
+    client.get(f"/exercises/{ids[0]}")  # cached before the update
+    response = client.patch("/exercises/bulk", headers=auth_headers, json=[
+        {"id": ids[0], "name": "Renamed"},
+        {"id": ids[1], "difficulty_level": 5, "is_public": False},
+        {"id": other, "name": "Not mine"},
+        {"id": str(uuid.uuid4()), "name": "Missing"},
+    ])
+    assert [result["status"] for result in response.json()["results"]] == ["updated", "updated", "error", "error"]
+    assert client.get(f"/exercises/{ids[0]}").json()["name"] == "Renamed"
+    assert client.get(f"/exercises/{ids[1]}", headers=auth_headers).json()["difficulty_level"] == 5
+    
+    client.post(f"/exercises/{ids[2]}/favorite", headers=auth_headers2)
+    response = client.request("DELETE", "/exercises/bulk", headers=auth_headers, json={"ids": [ids[2], other]})
+    assert [result["status"] for result in response.json()["results"]] == ["deleted", "error"]
+    assert client.get(f"/exercises/{ids[2]}").status_code == 404
+    assert db.query(models.Favorite).filter(models.Favorite.exercise_id == ids[2]).count() == 0
+    
+    response = client.post("/exercises/bulk", json=[{}] * 5001, headers=auth_headers)
+    assert response.status_code == 400
+
+def test_bulk_update_interactions(auth_headers, auth_headers2, db):
+    ids = [client.post("/exercises/", json={"name": f"Bulk saved {i}", "description": "Bulk", "difficulty_level": 1},
+                       headers=auth_headers).json()["id"] for i in range(3)]
+    client.post(f"/exercises/{ids[0]}/save", headers=auth_headers2)
+    missing = str(uuid.uuid4())
+    private = client.post("/exercises/", json={"name": "Bulk private", "description": "Bulk", "difficulty_level": 1,
+                                               "is_public": False}, headers=auth_headers).json()["id"]
+    
+    response = client.post("/exercises/bulk/interactions", headers=auth_headers2,
+                           json={"interaction_type": "saves", "add": [ids[0], ids[1], ids[2], missing, private]})
+    data = response.json()
+    assert sorted(data["added"]) == sorted(ids[1:])
+    assert data["failed"] == {missing: "Exercise not found", private: "Not authorized to access this resource"}
+    
+    response = client.post("/exercises/bulk/interactions", headers=auth_headers2,
+                           json={"interaction_type": "saves", "remove": [ids[0], ids[2], missing]})
+    assert sorted(response.json()["removed"]) == sorted([ids[0], ids[2]])
+    
+    counts = dict(db.query(models.Exercise.id, models.Exercise.save_count).filter(models.Exercise.id.in_(ids)))
+    assert counts == {ids[0]: 0, ids[1]: 1, ids[2]: 0}
+    # Interactions are not edits of the exercises
+    assert {updated_at for updated_at, in db.query(models.Exercise.updated_at).filter(models.Exercise.id.in_(ids))} == {None}
+    assert client.get(f"/exercises/{ids[1]}", headers=auth_headers2).json()["is_saved"] is True
+    
+    response = client.post("/exercises/bulk/interactions", headers=auth_headers2,
+                           json={"interaction_type": "saves", "add": [ids[0]], "remove": [ids[0]]})
+    assert response.status_code == 400
+
+def test_export_exercises(auth_headers, auth_headers2):
+    for i, is_public in enumerate((True, True, False)):
+        client.post("/exercises/", json={"name": f"Exported, {i}", "description": "Line one\nline two",
+                                         "difficulty_level": 3, "is_public": is_public}, headers=auth_headers)
+    
+    response = client.get("/exercises/export", headers=auth_headers2)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["name"] for row in rows) == ["Exported, 0", "Exported, 1"]
+    assert rows[0]["favorite_count"] == 0 and "is_favorited" not in rows[0]
+    
+    response = client.get("/exercises/export", params={"format": "csv"}, headers=auth_headers)
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 3
+    assert rows[0]["description"] == "Line one\nline two"
+    
+    assert client.get("/exercises/export", params={"format": "xml"}).status_code == 400
+
@@ -1,3 +1,4 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -142,4 +143,33 @@ def test_get_user_interactions(client):
     # Test invalid interaction type
     response = client.get(f"/users/{user_id}/interactions", params={"interaction_type": "invalid"}, headers=headers)
     assert response.status_code == 422
-    assert "Invalid interaction type" in response.json()["detail"] 
\ No newline at end of file
+    assert "Invalid interaction type" in response.json()["detail"]
+
+def test_get_user_interactions_paginated_and_streamed(client):
+    """Test cursor pagination and NDJSON streaming of a user's interactions"""
+    user_id = client.post("/auth/register", json={"username": "pageduser", "password": "testpass123"}).json()["id"]
+    token_response = client.post("/auth/token", data={"username": "pageduser", "password": "testpass123"})
+    headers = {"Authorization": f"Bearer {token_response.json()['access_token']}"}
+    
+    exercise_ids = []
+    for i in range(3):
+        response = client.post("/exercises/", json={
+            "name": f"Paged {i}", "description": "Paged", "difficulty_level": 1, "is_public": True
+        }, headers=headers)
+        exercise_ids.append(response.json()["id"])
+        client.post(f"/exercises/{exercise_ids[-1]}/favorite", headers=headers)
+    
+    params = {"interaction_type": "favorites", "limit": 2}
+    response = client.get(f"/users/{user_id}/interactions", params=params, headers=headers)
+    assert len(response.json()) == 2
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(f"/users/{user_id}/interactions", params={**params, "cursor": cursor}, headers=headers)
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+    
+    response = client.get(f"/users/{user_id}/interactions",
+                          params={"interaction_type": "favorites", "stream": True}, headers=headers)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(exercise["id"] for exercise in streamed) == sorted(exercise_ids)
+    assert all(exercise["favorite_count"] == 1 and exercise["is_favorited"] for exercise in streamed)